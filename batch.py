@@ -0,0 +1,196 @@
+import os
+import re
+import sys
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, TextIO
+
+from browser_pool import close_default_pool
+from cache import ScrapeCache, normalize_url
+from convo import Convo2Slide
+from scrape import last_time_to_ready, log_readiness_stats
+from stages import Job, Stage, StagedPipeline
+from utility import create_presentation
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+BATCH_SCRAPE_CONCURRENCY = int(os.environ.get("BATCH_SCRAPE_CONCURRENCY", 2))
+BATCH_RENDER_CONCURRENCY = int(os.environ.get("BATCH_RENDER_CONCURRENCY", os.cpu_count() or 1))
+BATCH_QUEUE_SIZE = int(os.environ.get("BATCH_QUEUE_SIZE", 8))
+
+
+def read_urls(source: str) -> List[str]:
+    """
+    Read URLs from a file, one per line, or from stdin when ``source`` is "-".
+
+    Blank lines and lines starting with "#" are skipped, and URLs that normalize
+    to an earlier one are dropped.
+
+    Args:
+        source (str): Path of the URL file, or "-" for stdin
+
+    Returns:
+        List[str]: The URLs in input order.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = Path(source).read_text().splitlines()
+
+    urls = {}
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            urls.setdefault(normalize_url(url), url)
+    return list(urls.values())
+
+
+def deck_filename(url: str) -> str:
+    """
+    Return a deterministic, filesystem-safe file name for the deck of ``url``.
+
+    The name combines a slug of the last URL path segment with a short hash of
+    the normalized URL, so reruns overwrite the same file.
+    """
+    normalized = normalize_url(url)
+    segment = normalized.rstrip('/').rsplit('/', 1)[-1].split('?', 1)[0]
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', segment).strip('-')[:40] or 'deck'
+    return f"{slug}-{ScrapeCache.key(url)[:10]}.pptx"
+
+
+class BatchRunner():
+    """
+    Converts many conversation URLs into decks with a staged pipeline.
+
+    Scraping, LLM calls and rendering run in separate stages with their own
+    worker counts and bounded queues, so the browser-, network- and CPU-bound
+    work of different URLs overlaps. ``concurrency`` is the number of LLM workers.
+    """
+
+    def __init__(self, output_dir: Path, concurrency: int = BATCH_CONCURRENCY,
+                 scrape_concurrency: int = BATCH_SCRAPE_CONCURRENCY, render_concurrency: int = BATCH_RENDER_CONCURRENCY, refresh: bool = False,
+                 queue_size: int = BATCH_QUEUE_SIZE) -> None:
+        self.output_dir = Path(output_dir)
+        self.refresh = refresh
+        self.pipeline = StagedPipeline([
+            Stage("scrape", self.scrape, scrape_concurrency, queue_size, on_worker_exit=close_default_pool),
+            Stage("llm", self.generate, concurrency, queue_size),
+            Stage("render", self.render, render_concurrency, queue_size),
+        ])
+
+    def scrape(self, job: Job):
+        convo2slide = Convo2Slide(job.key, refresh=self.refresh)
+        job.data["convo2slide"] = convo2slide
+        convo2slide.chat = convo2slide.scrape()
+        if convo2slide.chat == []:
+            raise Exception("Empty list of chat messages")
+
+    def generate(self, job: Job):
+        convo2slide = job.data["convo2slide"]
+        convo2slide.generate_note()
+        if not convo2slide.generate_slides():
+            raise Exception("No slide JSON in the response")
+
+    def render(self, job: Job):
+        # Decks already render side by side here, so keep each one in this process
+        presentation = create_presentation(job.data["convo2slide"].slides_data, workers=1)
+        presentation.save(str(self.output_dir / deck_filename(job.key)))
+
+    def record(self, job: Job) -> dict:
+        """
+        Build the summary record of a finished job.
+        """
+        convo2slide = job.data.get("convo2slide")
+        record = {
+            "url": job.key,
+            "output": None if job.error else str(self.output_dir / deck_filename(job.key)),
+            "status": "error" if job.error else "ok",
+            "error": f"{job.failed_stage}: {type(job.error).__name__}: {job.error}" if job.error else None,
+            "timings": job.timings,
+        }
+        if convo2slide is not None and convo2slide.chat:
+            record["messages"] = len(convo2slide.chat)
+        time_to_ready = last_time_to_ready(job.key)
+        if time_to_ready is not None:
+            record["time_to_ready"] = round(time_to_ready, 4)
+        if convo2slide is not None and convo2slide.slides_data:
+            record["slides"] = len(convo2slide.slides_data.get('presentation', {}).get('slides', []))
+        return record
+
+    def run(self, urls: Iterable[str], summary: TextIO) -> List[dict]:
+        """
+        Convert every URL and write one JSON summary line per URL as it finishes.
+
+        Args:
+            urls (Iterable[str]): The conversation URLs
+            summary (TextIO): Stream the JSONL summary is written to
+
+        Returns:
+            List[dict]: The summary records in completion order.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        urls = list(urls)
+        logger.info(f"Converting {len(urls)} urls")
+
+        self.pipeline.start()
+        # Submit from a separate thread so results are consumed while the queues are full
+        submitter = threading.Thread(target=self._submit, args=(urls,), daemon=True)
+        submitter.start()
+
+        records = []
+        for job in self.pipeline.results():
+            job.timings["total"] = round(sum(job.timings.values()), 4)
+            record = self.record(job)
+            records.append(record)
+            summary.write(json.dumps(record) + "\n")
+            summary.flush()
+        submitter.join()
+
+        failed = sum(record["status"] != "ok" for record in records)
+        logger.info(f"Converted {len(records) - failed} urls, {failed} failed")
+        logger.info(f"Stage stats: {json.dumps(self.pipeline.stats())}")
+        log_readiness_stats()
+        return records
+
+    def _submit(self, urls: List[str]):
+        for url in urls:
+            self.pipeline.submit(Job(url))
+        self.pipeline.close()
+
+
+def run_batch(source: str, output_dir: Path, summary_path: Optional[str] = None,
+              concurrency: int = BATCH_CONCURRENCY, refresh: bool = False) -> List[dict]:
+    """
+    Convert the URLs listed in ``source`` and write a JSONL summary.
+
+    Args:
+        source (str): Path of the URL file, or "-" for stdin
+        output_dir (Path): Directory the decks are written to
+        summary_path (Optional[str]): JSONL summary path; "-" writes to stdout.
+            Defaults to summary.jsonl in ``output_dir``.
+        concurrency (int): Number of LLM workers
+        refresh (bool): Re-scrape conversations even if cached
+
+    Returns:
+        List[dict]: The summary records.
+    """
+    runner = BatchRunner(output_dir, concurrency=concurrency, refresh=refresh)
+    urls = read_urls(source)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    if summary_path == '-':
+        return runner.run(urls, sys.stdout)
+
+    summary_path = summary_path or str(Path(output_dir) / 'summary.jsonl')
+    with open(summary_path, 'w') as summary:
+        return runner.run(urls, summary)
@@ -0,0 +1,96 @@
+"""
+Measure the per-call overhead of building an aisuite client for every completion
+against reusing the pooled client from utility.get_client.
+
+A local stub OpenAI-compatible server answers every request, so the numbers only
+reflect client setup and connection handling.
+
+Usage:
+    python benchmarks/bench_client.py [--calls N]
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+from pathlib import Path
+from time import perf_counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import aisuite as ai
+from utility import get_client
+
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        StubHandler.connections.add(self.client_address)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, *args):
+        pass
+
+
+def per_call_client(configs, messages):
+    client = ai.Client()
+    client.configure(configs)
+    return client.chat.completions.create(model="openai:stub", messages=messages)
+
+
+def shared_client(configs, messages):
+    return get_client(configs).chat.completions.create(model="openai:stub", messages=messages)
+
+
+def run(label, call, configs, calls):
+    messages = [{"role": "user", "content": "ping"}]
+    StubHandler.connections.clear()
+    call(configs, messages)  # warm up imports and the shared client
+    started = perf_counter()
+    for _ in range(calls):
+        call(configs, messages)
+    elapsed = perf_counter() - started
+    print(f"{label:<18} {elapsed / calls * 1000:8.3f} ms/call  {len(StubHandler.connections):4d} connections")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    configs = {"openai": {"api_key": "stub", "base_url": f"http://127.0.0.1:{server.server_port}/v1"}}
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    per_call = run("client per call", per_call_client, configs, args.calls)
+    shared = run("shared client", shared_client, configs, args.calls)
+    print(f"saved {(per_call - shared) / args.calls * 1000:.3f} ms per call")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare per-element message extraction with the single page.evaluate path.
+
+Usage:
+    python benchmarks/bench_extract.py [--repeat N] [--fixture PATH]
+"""
+import sys
+import argparse
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.sync_api import sync_playwright
+from scrape import MESSAGE_SELECTOR, extract_messages
+
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'conversation.html'
+
+
+def extract_per_element(page):
+    """The previous extraction path: one query plus two round trips per message."""
+    round_trips = 1
+    chat_data = []
+    for message in page.query_selector_all(MESSAGE_SELECTOR):
+        role = message.get_attribute('data-message-author-role')
+        content = message.inner_text()
+        round_trips += 2
+        chat_data.append({'role': role, 'content': content})
+    return chat_data, round_trips
+
+
+def extract_bulk(page):
+    return extract_messages(page), 1
+
+
+def measure(page, extract, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        chat_data, round_trips = extract(page)
+        timings.append(perf_counter() - started)
+    timings.sort()
+    return chat_data, round_trips, timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--fixture', type=Path, default=FIXTURE)
+    args = parser.parse_args()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.goto(args.fixture.resolve().as_uri())
+
+        legacy, legacy_trips, legacy_time = measure(page, extract_per_element, args.repeat)
+        bulk, bulk_trips, bulk_time = measure(page, extract_bulk, args.repeat)
+        browser.close()
+
+    assert legacy == bulk, "Both extraction paths must return the same messages"
+
+    print(f"messages:      {len(bulk)}")
+    print(f"per-element:   {legacy_trips:5d} round trips  {legacy_time * 1000:9.2f} ms (median)")
+    print(f"bulk evaluate: {bulk_trips:5d} round trips  {bulk_time * 1000:9.2f} ms (median)")
+    print(f"speedup:       {legacy_time / bulk_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
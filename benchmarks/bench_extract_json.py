@@ -0,0 +1,120 @@
+"""
+Compare the greedy regex JSON extraction with the brace-aware scanner in
+utility.extract_json.
+
+No model outputs are recorded in the repository, so by default a synthetic
+corpus is generated that mimics them: slide JSON of various sizes, bare or in
+a ```json fence, with prose before and after that may contain braces. Pass
+--corpus to use a directory of recorded outputs (*.txt) instead.
+
+Before timing, the scanner is checked to reject malformed outputs whose
+nested objects are valid JSON on their own, instead of returning a fragment.
+
+Usage:
+    python benchmarks/bench_extract_json.py [--repeat N] [--corpus DIR]
+"""
+import re
+import sys
+import json
+import random
+import logging
+import argparse
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utility import extract_json
+
+
+PROLOGUES = [
+    "",
+    "Here is the presentation you asked for:\n\n",
+    "Sure! I used the {note} sections as slides.\n\n",
+]
+EPILOGUES = [
+    "",
+    "\n\nLet me know if you want changes.",
+    "\n\nEach slide follows the {title, content} structure.",
+]
+
+# Broken outputs with valid nested objects; extract_json must return None for them
+MALFORMED = [
+    '{"presentation": {"title": "T", "subtitle": "S", "slides": '
+    '[{"title": "a", "paragraph": "p", "bullet_points": ["x"]},]}}',
+    '{"a": [{"b": 1},]}',
+    'Here you go: {"presentation": {"slides": [{"title": "a"}], "title": }}',
+]
+
+
+def legacy_extract_json(text):
+    """The previous implementation: greedy regex, then json.loads."""
+    json_match = re.search(r'\{.*\}', text, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group(0))
+    return None
+
+
+def synthetic_output(rng, slides):
+    data = {"presentation": {
+        "title": "Scaling a {curly} service",
+        "subtitle": 'Notes on "braces" and \\ escapes',
+        "slides": [{
+            "title": f"Slide {number}",
+            "content": "Use {placeholders} carefully. " * rng.randint(1, 6),
+            "bullet_points": [f"Point {point} with a \"quote\" and a }} brace" for point in range(rng.randint(2, 6))],
+        } for number in range(slides)],
+    }}
+    body = json.dumps(data, indent=rng.choice([None, 2]))
+    if rng.random() < 0.5:
+        body = f"```json\n{body}\n```"
+    return rng.choice(PROLOGUES) + body + rng.choice(EPILOGUES)
+
+
+def load_corpus(directory, size, seed):
+    if directory is not None:
+        return [path.read_text() for path in sorted(Path(directory).glob('*.txt'))]
+    rng = random.Random(seed)
+    return [synthetic_output(rng, rng.choice([3, 10, 30, 100])) for _ in range(size)]
+
+
+def measure(extract, corpus, repeat):
+    ok = 0
+    best = float('inf')
+    for _ in range(repeat):
+        ok = 0
+        started = perf_counter()
+        for text in corpus:
+            try:
+                ok += extract(text) is not None
+            except ValueError:
+                pass
+        best = min(best, perf_counter() - started)
+    return ok, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--size', type=int, default=200, help="Number of synthetic outputs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus', type=Path, help="Directory of recorded model outputs (*.txt)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    for text in MALFORMED:
+        assert extract_json(text) is None, f"scanner returned a fragment of {text!r}"
+    print(f"{len(MALFORMED)} malformed outputs rejected")
+
+    corpus = load_corpus(args.corpus, args.size, args.seed)
+    total_bytes = sum(len(text) for text in corpus)
+    print(f"{len(corpus)} outputs, {total_bytes / 1024:.0f} KiB")
+
+    for name, extract in [("greedy regex", legacy_extract_json), ("scanner", extract_json)]:
+        ok, seconds = measure(extract, corpus, args.repeat)
+        print(f"{name:>12}: {ok}/{len(corpus)} parsed, {seconds * 1000:8.2f} ms, "
+              f"{total_bytes / seconds / 2 ** 20:7.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
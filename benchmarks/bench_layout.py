@@ -0,0 +1,129 @@
+"""
+Compare the step-down font fitting of content slides with layout.fit_font_size
+on synthetic 100-slide decks, and check that the binary search picks the same
+font sizes as stepping down over the same measurements.
+
+The step-down baseline uses the original fixed-width (0.6 em) estimate.
+
+Usage:
+    python benchmarks/bench_layout.py [--decks N] [--slides N] [--repeat N]
+"""
+import sys
+import random
+import logging
+import argparse
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from layout import CONTENT_FONT_SIZES, clear_layout_cache, content_height, fit_font_size
+from utility import create_presentation
+
+
+WORDS = ("the model streams tokens while each request waits on latency throughput cache memory "
+         "layout slide paragraph bullet point renderer measurement benchmark pipeline scheduler "
+         "a of to in is internationalization = x^2 + y^2 configuration").split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_deck(rng, slides):
+    return {"presentation": {
+        "title": sentence(rng, 6),
+        "subtitle": sentence(rng, 10),
+        "slides": [{
+            "title": sentence(rng, 4),
+            "paragraph": " ".join(sentence(rng, rng.randint(8, 25)) for _ in range(rng.randint(1, 6))),
+            "bullet_points": [sentence(rng, rng.randint(5, 30)) for _ in range(rng.randint(2, 7))],
+        } for _ in range(slides)],
+    }}
+
+
+def fixed_width_text_height(text, font_size, width_inches):
+    """The original estimate: every character is 0.6 em wide, walked word by word."""
+    chars_per_line = int((width_inches * 96) / (font_size * 0.6))
+    lines = 1
+    current_line_length = 0
+    for word in text.split():
+        if current_line_length + len(word) + 1 > chars_per_line:
+            lines += 1
+            current_line_length = len(word)
+        else:
+            current_line_length += len(word) + 1
+    return (lines * font_size * 1.2) / 72
+
+
+def fixed_width_content_height(paragraph_text, bullet_points, font_size):
+    total_height = 0
+    if paragraph_text:
+        total_height += fixed_width_text_height(paragraph_text, font_size, 12) + 0.3
+    for point in bullet_points:
+        total_height += fixed_width_text_height(point, font_size, 11) + 0.1
+    return total_height
+
+
+def step_down(height):
+    """The previous fitting loop of create_content_slide, over the given height estimate."""
+    def fit(paragraph_text, bullet_points):
+        font_size = CONTENT_FONT_SIZES[-1]
+        while font_size > CONTENT_FONT_SIZES[0] and height(paragraph_text, bullet_points, font_size) > 4.5:
+            font_size -= 1
+        return font_size
+    return fit
+
+
+def fit_decks(decks, fit):
+    return [fit(slide["paragraph"], slide["bullet_points"])
+            for deck in decks for slide in deck["presentation"]["slides"]]
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        best = min(best, perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--decks', type=int, default=10)
+    parser.add_argument('--slides', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    decks = [synthetic_deck(rng, args.slides) for _ in range(args.decks)]
+    slides = args.decks * args.slides
+
+    expected = fit_decks(decks, step_down(content_height))
+    clear_layout_cache()
+    sizes = fit_decks(decks, fit_font_size)
+    assert sizes == expected, "binary search picked different font sizes than stepping down"
+    print(f"{args.decks} decks x {args.slides} slides, binary search matches step-down; "
+          f"distribution: {sorted((size, sizes.count(size)) for size in set(sizes))}")
+
+    step_down_time = best_of(args.repeat, lambda: fit_decks(decks, step_down(fixed_width_content_height)))
+
+    def cold():
+        clear_layout_cache()
+        fit_decks(decks, fit_font_size)
+
+    cold_time = best_of(args.repeat, cold)
+    warm_time = best_of(args.repeat, lambda: fit_decks(decks, fit_font_size))
+
+    for name, seconds in [("step-down", step_down_time), ("layout cold", cold_time), ("layout warm", warm_time)]:
+        print(f"{name:>12}: {seconds * 1000:8.2f} ms total, {seconds / slides * 1e6:7.1f} us/slide")
+
+    logging.disable(logging.INFO)
+    render = best_of(1, lambda: [create_presentation(deck) for deck in decks[:2]])
+    print(f"{'render':>12}: {render / (2 * args.slides) * 1e3:7.2f} ms/slide with create_presentation, for scale")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measure the cost of real font metrics: loading the glyph-width tables at
+startup, and wrapping strings with them.
+
+Startup is measured in fresh interpreters after the imports, parsing the
+TrueType fonts and reading the cached width tables. Throughput compares the
+original fixed-width (0.6 em) estimate with layout.line_counts for one font
+size and for all content font sizes, with cold and warm word-width caches.
+
+Usage:
+    python benchmarks/bench_metrics.py [--strings N] [--runs N]
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_layout import WORDS, fixed_width_text_height, sentence
+from layout import CONTENT_FONT_SIZES, PARAGRAPH_WIDTH, clear_layout_cache, line_counts
+from metrics import get_font_metrics
+
+
+STARTUP_SCRIPT = """
+from metrics import get_font_metrics
+from time import perf_counter
+started = perf_counter()
+get_font_metrics()
+get_font_metrics(bold=True)
+print(perf_counter() - started)
+"""
+
+
+def startup_seconds(cache_dir, runs):
+    env = dict(os.environ, CONVO2SLIDE_CACHE_DIR=cache_dir)
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=ROOT, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        timings.append(float(output.split()[-1]))
+    return sorted(timings)[len(timings) // 2]
+
+
+def throughput(strings, func):
+    started = perf_counter()
+    for text in strings:
+        func(text)
+    return len(strings) / (perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--strings', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # The first run parses the fonts and writes the width tables
+        parse = startup_seconds(cache_dir, 1)
+        cached = startup_seconds(cache_dir, args.runs)
+    print(f"startup, parse TrueType fonts: {parse * 1000:7.2f} ms")
+    print(f"startup, cached width tables:  {cached * 1000:7.2f} ms")
+
+    rng = random.Random(args.seed)
+    strings = [sentence(rng, rng.randint(5, 60)) for _ in range(args.strings)]
+    metrics = get_font_metrics()
+    print(f"{len(strings)} strings, {sum(map(len, strings)) / len(strings):.0f} characters on average, "
+          f"vocabulary of {len(WORDS)} words")
+
+    results = [("fixed width, one size", throughput(strings, lambda text: fixed_width_text_height(text, 20, 12)))]
+
+    metrics._word_widths.clear()
+    clear_layout_cache()
+    results.append(("metrics, one size, cold", throughput(strings, lambda text: line_counts(text, PARAGRAPH_WIDTH, (20,)))))
+    clear_layout_cache()
+    results.append(("metrics, one size, warm words",
+                    throughput(strings, lambda text: line_counts(text, PARAGRAPH_WIDTH, (20,)))))
+    clear_layout_cache()
+    results.append((f"metrics, {len(CONTENT_FONT_SIZES)} sizes, warm words",
+                    throughput(strings, lambda text: line_counts(text, PARAGRAPH_WIDTH))))
+    results.append(("metrics, cached line counts", throughput(strings, lambda text: line_counts(text, PARAGRAPH_WIDTH))))
+
+    for name, per_second in results:
+        print(f"{name:>32}: {per_second / 1000:8.1f} k strings/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare utility.parse_topics (lxml pull parser) with the previous
+BeautifulSoup implementation on synthetic topic XML, and check that both
+return the same tuple, including when the XML is fed to TopicStreamParser in
+small chunks.
+
+Tag case varies between documents to exercise case-insensitive matching, and
+some texts contain a bare ``&`` or ``<`` like model output does. The
+BeautifulSoup version mangles those, so it is given the same document with
+the text escaped.
+
+Usage:
+    python benchmarks/bench_parse_topics.py [--docs N] [--slides N] [--repeat N]
+"""
+import re
+import sys
+import random
+import logging
+import argparse
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bs4 import BeautifulSoup
+from bench_layout import best_of, sentence
+from slide_stream import TopicStreamParser, iter_topics
+from utility import parse_topics
+
+
+def beautifulsoup_parse_topics(xml_string):
+    """The previous parse_topics, without its logging."""
+    match = re.search(r"<PowerPoint.*?>.*?</PowerPoint>", xml_string, re.DOTALL | re.IGNORECASE)
+    soup = BeautifulSoup(match.group(0), 'xml')
+    title = soup.find(re.compile('Title', re.IGNORECASE)).get_text(strip=True)
+    subtitle = soup.find(re.compile('Subtitle', re.IGNORECASE)).get_text(strip=True)
+
+    slides_data = []
+    for slide in soup.find_all(re.compile('Slide', re.IGNORECASE)):
+        slide_title = slide.find(re.compile('Title', re.IGNORECASE))
+        bullet_points = slide.find_all(re.compile('BulletPoint', re.IGNORECASE))
+        if slide_title:
+            slides_data.append({
+                "title": slide_title.get_text(strip=True),
+                "points": [point.get_text(strip=True) for point in bullet_points],
+            })
+    return title, subtitle, slides_data
+
+
+# Unescaped text the model writes, including an entity name XML does not define
+STRAY_TEXTS = ["R&D", "Q&A", "x < y", "n<3", "AT&T&", "&nbsp;", "a && b"]
+
+
+def synthetic_topics(rng, slides):
+    """Return a document and the same document with its text escaped."""
+    case = rng.choice([str, str.lower, str.upper])
+    texts = []
+
+    def tag(name, words):
+        text = sentence(rng, words)
+        if rng.random() < 0.2:
+            text += " " + rng.choice(STRAY_TEXTS)
+        texts.append(text)
+        return f"<{case(name)}>\0</{case(name)}>"
+
+    body = "".join(
+        "<{0}>{1}{2}</{0}>".format(case("Slide"), tag("Title", 4),
+                                   "".join(tag("BulletPoint", rng.randint(5, 20))
+                                           for _ in range(rng.randint(2, 6))))
+        for _ in range(slides))
+    template = (f"Here are the slides:\n<{case('PowerPoint')}>{tag('Title', 6)}"
+                f"{tag('Subtitle', 10)}{body}</{case('PowerPoint')}>\nLet me know!")
+
+    def fill(texts):
+        parts = template.split("\0")
+        return "".join(part + text for part, text in zip(parts, texts)) + parts[-1]
+
+    return fill(texts), fill([escape(text) for text in texts])
+
+
+def chunked(text, rng):
+    start = 0
+    while start < len(text):
+        end = start + rng.randint(1, 40)
+        yield text[start:end]
+        start = end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=50)
+    parser.add_argument('--slides', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(args.seed)
+    pairs = [synthetic_topics(rng, args.slides) for _ in range(args.docs)]
+    docs = [doc for doc, _ in pairs]
+    escaped_docs = [escaped for _, escaped in pairs]
+
+    for doc, escaped_doc in pairs:
+        expected = beautifulsoup_parse_topics(escaped_doc)
+        assert parse_topics(doc) == expected, "parse_topics differs from the BeautifulSoup version"
+        stream = TopicStreamParser()
+        slides = list(iter_topics(chunked(doc, rng), stream))
+        assert (stream.title, stream.subtitle, slides) == expected, "chunked parsing differs"
+    print(f"{args.docs} documents x {args.slides} slides, {sum(map(len, docs)) // args.docs} characters each: "
+          f"same results, also when streamed in chunks")
+
+    soup_time = best_of(args.repeat, lambda: [beautifulsoup_parse_topics(doc) for doc in escaped_docs])
+    lxml_time = best_of(args.repeat, lambda: [parse_topics(doc) for doc in docs])
+    for name, seconds in [("BeautifulSoup", soup_time), ("lxml pull", lxml_time)]:
+        print(f"{name:>14}: {seconds / args.docs * 1000:7.3f} ms/document, {soup_time / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare peak memory and time of building a deck in memory and saving it with
+streaming it to disk with pptx_writer, and check that both files contain the
+same parts.
+
+Each mode runs in a fresh interpreter so peak RSS is not shared.
+
+Usage:
+    python benchmarks/bench_pptx_writer.py [--sizes 100,400,1600]
+"""
+import sys
+import json
+import zipfile
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+RUN_SCRIPT = """
+import sys, json, random, logging, resource
+from time import perf_counter
+sys.path.insert(0, 'benchmarks')
+logging.disable(logging.INFO)
+from bench_layout import synthetic_deck
+from pptx_writer import write_presentation
+from utility import create_presentation
+
+mode, size, path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+deck = synthetic_deck(random.Random(0), size)
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = perf_counter()
+if mode == "stream":
+    write_presentation(path, deck)
+else:
+    create_presentation(deck, workers=1).save(path)
+elapsed = perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "peak_kib": peak, "growth_kib": peak - before}))
+"""
+
+
+def run(mode, size, path):
+    output = subprocess.run([sys.executable, "-c", RUN_SCRIPT, mode, str(size), path], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def parts(path):
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default="100,400,1600")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in map(int, args.sizes.split(",")):
+            saved, streamed = str(Path(tmp) / "saved.pptx"), str(Path(tmp) / "streamed.pptx")
+            results = {"save": run("save", size, saved), "stream": run("stream", size, streamed)}
+            assert parts(saved) == parts(streamed), "streamed deck differs from the saved one"
+            for mode, result in results.items():
+                print(f"{size:5} slides, {mode:>6}: {result['seconds'] * 1000:8.1f} ms, "
+                      f"RSS growth {result['growth_kib'] / 1024:7.1f} MiB, peak {result['peak_kib'] / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare serial rendering with the process pool of render_pool.py over deck
+sizes and worker counts, and check that every slide part of the saved
+presentation is byte-identical to the serial one.
+
+Timings include saving the deck; the pool is started before timing so its
+startup is not counted.
+
+Usage:
+    python benchmarks/bench_render_parallel.py [--sizes 50,100,200,400] [--workers 1,2,4] [--repeat N]
+"""
+import io
+import os
+import sys
+import random
+import logging
+import zipfile
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_layout import best_of, synthetic_deck
+from render_pool import create_presentation_parallel, get_render_pool, shutdown_render_pool
+from utility import create_presentation
+
+
+def save(prs):
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+def slide_parts(pptx):
+    with zipfile.ZipFile(io.BytesIO(pptx)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()
+                if name.startswith('ppt/slides/')}
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default="50,100,200,400")
+    parser.add_argument('--workers', default=",".join(map(str, sorted({2, 4, cpus}))))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    worker_counts = [int(workers) for workers in args.workers.split(",")]
+    logging.disable(logging.INFO)
+    print(f"{cpus} CPUs")
+
+    rng = random.Random(args.seed)
+    for size in sizes:
+        deck = synthetic_deck(rng, size)
+        expected = slide_parts(save(create_presentation(deck, workers=1)))
+        serial = best_of(args.repeat, lambda: save(create_presentation(deck, workers=1)))
+        print(f"{size:4} slides, serial:     {serial * 1000:8.1f} ms")
+
+        for workers in worker_counts:
+            get_render_pool(workers)
+            assert slide_parts(save(create_presentation_parallel(deck, workers))) == expected, \
+                f"{workers} workers rendered different slides than serial mode"
+            parallel = best_of(args.repeat, lambda: save(create_presentation_parallel(deck, workers)))
+            print(f"{size:4} slides, {workers:2} workers: {parallel * 1000:8.1f} ms, "
+                  f"{serial / parallel:5.2f}x, identical slides")
+
+    shutdown_render_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Time every output format of renderers.py on a synthetic deck, and compare
+one shared layout pass with fitting the layout again for every format.
+
+The layout cache is cleared before every layout pass, so each pass measures
+and wraps the text from scratch like a fresh run would.
+
+Usage:
+    python benchmarks/bench_renderers.py [--slides N] [--repeat N]
+"""
+import sys
+import random
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_layout import best_of, synthetic_deck
+from layout import clear_layout_cache, layout_presentation
+from model import Presentation
+from renderers import RENDERERS, get_renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--slides', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    deck = Presentation.from_json(synthetic_deck(random.Random(args.seed), args.slides))
+    renderers = [get_renderer(name, workers=1) for name in RENDERERS]
+
+    def fresh_layout(wrap):
+        clear_layout_cache()
+        return layout_presentation(deck, wrap)
+
+    layout_time = best_of(args.repeat, lambda: fresh_layout(True))
+    deck_layout = fresh_layout(True)
+    print(f"{args.slides} slides, layout with wrapped lines: {layout_time * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        render_times = {}
+        for renderer in renderers:
+            path = Path(tmp) / f"deck{renderer.extension}"
+            render_times[renderer.name] = best_of(args.repeat, lambda: renderer.render(deck, deck_layout, path))
+            print(f"{renderer.name:>6}: {render_times[renderer.name] * 1000:8.1f} ms, "
+                  f"{path.stat().st_size / 1024:7.1f} KiB")
+
+    total_render = sum(render_times.values())
+    shared = layout_time + total_render
+    per_format = len(renderers) * layout_time + total_render
+    print(f"all formats, shared layout:     {shared * 1000:8.1f} ms")
+    print(f"all formats, layout per format: {per_format * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import os
+import sys
+import atexit
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Optional
+from playwright.sync_api import sync_playwright
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_PAGES_PER_CONTEXT = int(os.environ.get("SCRAPE_POOL_MAX_PAGES", 50))
+
+_install_lock = threading.Lock()
+_browser_installed = False
+
+_local = threading.local()
+
+
+def install_browser_forcefully():
+    """
+    Force a clean installation of Playwright browser with all dependencies.
+    Raises subprocess.CalledProcessError if installation fails.
+    """
+    logger.info("Starting forced browser installation")
+    try:
+        # Install browser and dependencies
+        subprocess.run([sys.executable, "-m", "playwright", "install","--with-deps", "chromium"],
+                      check=True, capture_output=True)
+
+        logger.info("Browser installation completed successfully")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Browser installation failed: {e.stdout.decode() if e.stdout else ''}")
+        raise
+
+
+def ensure_browser_installed() -> bool:
+    """
+    Run the forced browser installation at most once per process.
+
+    Returns:
+        bool: True once the browser has been installed successfully.
+
+    Raises:
+        subprocess.CalledProcessError: If the installation fails. A failed
+            installation is retried on the next call.
+    """
+    global _browser_installed
+
+    if _browser_installed:
+        return True
+
+    with _install_lock:
+        if not _browser_installed:
+            install_browser_forcefully()
+            _browser_installed = True
+
+    return True
+
+
+class BrowserPool():
+    """
+    A long-lived Chromium instance with one warm browser context.
+
+    Callers lease a fresh page from the context and return it when the
+    ``with`` block exits. The context is recycled after serving
+    ``max_pages_per_context`` pages, and the whole browser is relaunched if it
+    is found disconnected.
+
+    Playwright's sync API is bound to the thread that started it, so a pool
+    must only be used from the thread that created it, and every thread that
+    scrapes runs its own browser. A thread scrapes one page at a time, so one
+    context per browser is all it needs; pages leased while another lease of
+    the same thread is open share the context. Use ``get_default_pool`` to
+    get the pool of the current thread.
+    """
+
+    def __init__(self, max_pages_per_context: int = DEFAULT_MAX_PAGES_PER_CONTEXT,
+                 headless: bool = True) -> None:
+        self.max_pages_per_context = max_pages_per_context
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._pages_served = 0
+        self._leased = 0
+
+    def start(self) -> "BrowserPool":
+        """
+        Launch the browser and warm up its context.
+        """
+        if self._browser is not None:
+            return self
+
+        ensure_browser_installed()
+        logger.info("Starting browser pool")
+        self._playwright = sync_playwright().start()
+        self._launch()
+        return self
+
+    def _launch(self):
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self._context = self._browser.new_context()
+        self._pages_served = 0
+        self._leased = 0
+
+    def is_healthy(self) -> bool:
+        """
+        Check that the browser process is still connected.
+        """
+        return self._browser is not None and self._browser.is_connected()
+
+    def _restart(self):
+        logger.warning("Browser pool is unhealthy, relaunching the browser")
+        try:
+            self._browser.close()
+        except Exception:
+            pass
+        self._launch()
+
+    def _recycle(self):
+        logger.info(f"Recycling browser context after {self._pages_served} pages")
+        try:
+            self._context.close()
+        except Exception:
+            pass
+        self._context = self._browser.new_context()
+        self._pages_served = 0
+
+    @contextmanager
+    def lease(self):
+        """
+        Lease a new page from the warm browser context.
+
+        Yields:
+            Page: A Playwright page that is closed when the block exits.
+        """
+        self.start()
+        if not self.is_healthy():
+            self._restart()
+
+        # Only recycle a context none of whose pages are still open
+        if self._leased == 0 and self._pages_served >= self.max_pages_per_context:
+            self._recycle()
+
+        browser = self._browser
+        try:
+            page = self._context.new_page()
+        except Exception:
+            if self._leased:
+                raise
+            self._recycle()
+            page = self._context.new_page()
+        self._leased += 1
+
+        try:
+            yield page
+        finally:
+            try:
+                page.close()
+            except Exception:
+                pass
+
+            if browser is self._browser:
+                self._leased -= 1
+                self._pages_served += 1
+
+    def close(self):
+        """
+        Close every context, the browser and the Playwright driver.
+        """
+        if self._browser is None:
+            return
+
+        logger.info("Closing browser pool")
+        try:
+            self._context.close()
+        except Exception:
+            pass
+        self._context = None
+
+        try:
+            self._browser.close()
+        finally:
+            self._browser = None
+            self._playwright.stop()
+            self._playwright = None
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_default_pool() -> BrowserPool:
+    """
+    Return the browser pool of the current thread, creating it on first use.
+
+    Returns:
+        BrowserPool: A pool configured from ``SCRAPE_POOL_MAX_PAGES``.
+    """
+    pool: Optional[BrowserPool] = getattr(_local, "pool", None)
+    if pool is None:
+        pool = BrowserPool()
+        _local.pool = pool
+        if threading.current_thread() is threading.main_thread():
+            atexit.register(pool.close)
+    return pool
+
+
+def close_default_pool():
+    """
+    Close the browser pool of the current thread, if it has one.
+
+    Worker threads that scraped with the default pool should call this before
+    exiting, since a pool can only be closed from the thread that created it.
+    """
+    pool: Optional[BrowserPool] = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
+        _local.pool = None
@@ -0,0 +1,308 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from time import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+CACHE_DIR = Path(os.environ.get("CONVO2SLIDE_CACHE_DIR", Path(__file__).parent / '.cache'))
+SCRAPE_CACHE_TTL = float(os.environ.get("SCRAPE_CACHE_TTL", 7 * 24 * 3600))
+SCRAPE_CACHE_MAX_BYTES = int(os.environ.get("SCRAPE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+COMPLETION_CACHE = os.environ.get("COMPLETION_CACHE", "sqlite")
+COMPLETION_CACHE_MAX_ENTRIES = int(os.environ.get("COMPLETION_CACHE_MAX_ENTRIES", 1024))
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a share URL so that equivalent spellings map to the same cache key.
+
+    The scheme and host are lowercased, the fragment, tracking parameters and
+    trailing slash are dropped and the remaining query parameters are sorted.
+
+    Args:
+        url (str): The URL to normalize
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith('utm_'))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+class ScrapeCache():
+    """
+    Content-addressed on-disk cache for scraped conversations.
+
+    Entries are keyed by the normalized URL plus an optional content hash and
+    stored as zlib-compressed compact JSON. Entries older than ``ttl`` seconds
+    are ignored, and the least recently used entries are evicted once the cache
+    grows beyond ``max_bytes``.
+    """
+
+    suffix = '.json.z'
+
+    def __init__(self, directory: Path = CACHE_DIR / 'scrape', ttl: Optional[float] = SCRAPE_CACHE_TTL,
+                 max_bytes: int = SCRAPE_CACHE_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(url: str, content_hash: Optional[str] = None) -> str:
+        """
+        Return the cache key for a URL and optional content hash.
+        """
+        material = normalize_url(url)
+        if content_hash:
+            material += '\0' + content_hash
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, url: str, content_hash: Optional[str] = None) -> Optional[List[Dict[str, str]]]:
+        """
+        Return the cached chat messages for ``url``, or None on a miss or expired entry.
+        """
+        path = self._path(self.key(url, content_hash))
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        if self.ttl is not None and time() - stat.st_mtime > self.ttl:
+            logger.info(f"Cached conversation for {url} expired")
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            rows = json.loads(zlib.decompress(path.read_bytes()))
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}.\nException: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # Reads refresh the access time used for LRU eviction
+        os.utime(path, (time(), stat.st_mtime))
+        logger.info(f"Loaded {len(rows)} cached chat messages for {url}")
+        return [{'role': role, 'content': content} for role, content in rows]
+
+    def put(self, url: str, chat_data: List[Dict[str, str]], content_hash: Optional[str] = None):
+        """
+        Store chat messages for ``url`` and evict old entries if the cache is too large.
+        """
+        rows = [[message['role'], message['content']] for message in chat_data]
+        payload = zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(self.key(url, content_hash)))
+
+        self.evict()
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in ``max_bytes``.
+        """
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted cache entry {path.name}")
+
+    def clear(self):
+        """
+        Delete every cache entry.
+        """
+        for path in self.directory.glob(f"*{self.suffix}"):
+            path.unlink(missing_ok=True)
+
+
+def completion_key(model: str, temperature: float, messages: list[dict]) -> str:
+    """
+    Return a stable hash of a completion request.
+
+    Args:
+        model (str): The model identifier, e.g. "openai:gpt-4o"
+        temperature (float): The sampling temperature
+        messages (list): The chat messages sent to the model
+
+    Returns:
+        str: A hex SHA-256 digest that only depends on the request content.
+    """
+    payload = json.dumps([model, temperature, messages], ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CompletionCache(ABC):
+    """
+    Interface for completion caches with hit and miss counters.
+
+    Subclasses implement ``_get``, ``put`` and ``delete``.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """
+        Return the completion stored under ``key``, or None.
+        """
+
+    @abstractmethod
+    def put(self, key: str, completion: str):
+        """
+        Store ``completion`` under ``key``.
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Remove the completion stored under ``key``, if any.
+        """
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached completion for ``key`` or None, updating the counters.
+        """
+        completion = self._get(key)
+        with self._counter_lock:
+            if completion is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return completion
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the hit and miss counters and the hit rate.
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+class MemoryCompletionCache(CompletionCache):
+    """
+    In-process LRU completion cache holding at most ``max_entries`` completions.
+    """
+
+    def __init__(self, max_entries: int = COMPLETION_CACHE_MAX_ENTRIES) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            completion = self._entries.get(key)
+            if completion is not None:
+                self._entries.move_to_end(key)
+            return completion
+
+    def put(self, key: str, completion: str):
+        with self._lock:
+            self._entries[key] = completion
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCompletionCache(CompletionCache):
+    """
+    Completion cache persisted in a SQLite database, shared across runs.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR / 'completions.sqlite') -> None:
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, completion TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT completion FROM completions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, completion: str):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completions (key, completion, created) VALUES (?, ?, ?)",
+                (key, completion, time())
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM completions WHERE key = ?", (key,))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def create_completion_cache(backend: str = COMPLETION_CACHE) -> Optional[CompletionCache]:
+    """
+    Build a completion cache by name.
+
+    Args:
+        backend (str): One of "memory", "sqlite" or "off"
+
+    Returns:
+        Optional[CompletionCache]: The cache, or None when caching is off.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend == "memory":
+        return MemoryCompletionCache()
+    if backend == "sqlite":
+        return SQLiteCompletionCache()
+    if backend == "off":
+        return None
+    raise ValueError(f"Unknown completion cache '{backend}'. Expected memory, sqlite or off.")
@@ -1,7 +1,18 @@
+import os
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+from cache import ScrapeCache
 from scrape import scrape_chat_messages
-from prompt import extract_note_system_prompt, extract_note_user_prompt, slide_system_prompt, slide_user_prompt
-from utility import get_completion, extract_json
+from slide_stream import SlideStreamParser, iter_slides
+from tokens import PROMPT_TOKEN_BUDGET, count_tokens, plan_prompt
+from prompt import (extract_note_system_prompt, extract_note_user_prompt, extract_note_user_prompt_compact,
+                    merge_note_system_prompt, merge_note_user_prompt, slide_fix_prompt, slide_system_prompt,
+                    slide_update_prompt, slide_user_prompt, slide_user_prompt_compact, update_note_user_prompt)
+from schema import (SlideValidationError, load_presentation, normalize_presentation, normalize_slide,
+                    validate_presentation, validate_slide)
+from utility import forget_completion, get_completion, stream_completion
 
 
 
@@ -13,14 +24,87 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+NOTE_CHUNK_TOKENS = int(os.environ.get("NOTE_CHUNK_TOKENS", 24000))
+NOTE_MAX_WORKERS = int(os.environ.get("NOTE_MAX_WORKERS", 4))
+
+
+def format_chat(chat: list[dict]) -> List[str]:
+    """
+    Format chat messages as "Role:  content" lines for the note prompts.
+    """
+    return [f"{message['role'].capitalize()}:  {message['content']}" for message in chat]
+
+
+def split_chat(chat_data: List[str], chunk_tokens: int) -> List[List[str]]:
+    """
+    Split formatted chat messages into chunks on message boundaries.
+
+    Messages are added to a chunk until the next one would exceed the token
+    budget. A single message larger than the budget forms a chunk on its own.
+
+    Args:
+        chat_data (List[str]): Formatted chat messages, one string per message
+        chunk_tokens (int): Token budget per chunk
+
+    Returns:
+        List[List[str]]: The chunks, in conversation order.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for message in chat_data:
+        tokens = count_tokens(message)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(message)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 class Convo2Slide():
 
-    def __init__(self, url) -> None:
+    def __init__(self, url, refresh: bool = False, scrape_cache: Optional[ScrapeCache] = None,
+                 note_chunk_tokens: int = NOTE_CHUNK_TOKENS, note_max_workers: int = NOTE_MAX_WORKERS,
+                 prompt_token_budget: int = PROMPT_TOKEN_BUDGET) -> None:
         self.url = url 
+        self.refresh = refresh
+        self.scrape_cache = scrape_cache if scrape_cache is not None else ScrapeCache()
+        self.note_chunk_tokens = note_chunk_tokens
+        self.note_max_workers = note_max_workers
+        self.prompt_token_budget = prompt_token_budget
         self.chat = []
         self.note = ""
+        self.slides_data = None
 
     
+    def scrape(self, refresh: Optional[bool] = None) -> list[dict]:
+        """
+        Scrape the conversation, reusing the cached copy unless a refresh was requested.
+
+        Args:
+            refresh (Optional[bool]): Scrape even if a cached copy exists, ``self.refresh`` by default.
+                A fresh copy is written to the cache either way.
+
+        Returns:
+            list: A list of dictionaries with 'role' and 'content' keys.
+        """
+        if refresh is None:
+            refresh = self.refresh
+        if not refresh:
+            chat = self.scrape_cache.get(self.url)
+            if chat:
+                return chat
+
+        chat = scrape_chat_messages(self.url)
+        if chat:
+            self.scrape_cache.put(self.url, chat)
+        return chat
+
     def construct_messages(self, user_prompt: str, system_prompt: str) -> list[dict]:
         """
         Construct the system and user prompts for the OpenAI API.
@@ -37,24 +121,39 @@ class Convo2Slide():
                     {"role": "user", "content": user_prompt+input}   
                 ]   
         
+    def slide_messages(self, previous_slides: Optional[dict] = None) -> list[dict]:
+        """
+        Construct the slide generation messages, using the compact template when
+        the full one would exceed the prompt token budget.
+
+        Args:
+            previous_slides (Optional[dict]): Slide JSON of an earlier version of the deck
+
+        Returns:
+            list: A list of dictionaries representing the system and user prompts.
+        """
+        plan = plan_prompt("slides", [("full", slide_user_prompt), ("compact", slide_user_prompt_compact)],
+                           self.note, slide_system_prompt, self.prompt_token_budget)
+        messages = self.construct_messages(plan.template, slide_system_prompt)
+        if previous_slides:
+            messages[-1]["content"] += slide_update_prompt.format(
+                previous_slides=json.dumps(previous_slides, ensure_ascii=False))
+        return messages
+
     def generate_note(self):
 
         try:
-            chat_data = [f"{message['role'].capitalize()}:  {message['content']}" for message in self.chat]
+            chat_data = format_chat(self.chat)
         except:
             logging.error("Failed to parse chat data - invalid dictionary format)")
             return []
         else:
-            temp = "\n".join(chat_data)
-            message = [
-                {"role": "system", "content": extract_note_system_prompt},
-                {"role": "user", "content": extract_note_user_prompt.format(chat_data=temp)}   
-
-            ]
-            # message = self.construct_messages("chat_data", temp, extract_note_user_prompt, extract_note_system_prompt) model="openai:gpt-4o-mini"
-
-            note = get_completion(message)
-            print(note, "\n\n\n\n")
+            chunks = split_chat(chat_data, self.note_chunk_tokens) if self.note_chunk_tokens > 0 else [chat_data]
+            if len(chunks) > 1:
+                note = self.map_reduce_note(chunks)
+            else:
+                note = self.extract_chunk_note(chat_data)
+            logger.debug(f"Generated note:\n{note}")
 
         if note:
             self.note = note    
@@ -62,6 +161,49 @@ class Convo2Slide():
             logger.error("empty value for the self note variable")
             raise    
 
+
+    def extract_chunk_note(self, chat_data: List[str]) -> str:
+        """
+        Extract a note from a list of formatted chat messages in a single call.
+        """
+        temp = "\n".join(chat_data)
+        plan = plan_prompt("note", [("full", extract_note_user_prompt), ("compact", extract_note_user_prompt_compact)],
+                           temp, extract_note_system_prompt, self.prompt_token_budget)
+        message = [
+            {"role": "system", "content": extract_note_system_prompt},
+            {"role": "user", "content": plan.template.format(chat_data=temp)}   
+
+        ]
+        # message = self.construct_messages("chat_data", temp, extract_note_user_prompt, extract_note_system_prompt) model="openai:gpt-4o-mini"
+
+        return get_completion(message)
+
+    def map_reduce_note(self, chunks: List[List[str]]) -> str:
+        """
+        Extract notes for each chunk concurrently and merge them into one note.
+
+        Args:
+            chunks (List[List[str]]): Formatted chat messages split by split_chat
+
+        Returns:
+            str: The merged note.
+        """
+        logger.info(f"Extracting notes from {len(chunks)} chunks with {self.note_max_workers} workers.")
+        with ThreadPoolExecutor(max_workers=self.note_max_workers) as executor:
+            notes = list(executor.map(self.extract_chunk_note, chunks))
+
+        if not all(notes):
+            logger.error("empty note for at least one chunk of the chat")
+            return ""
+
+        sections = [f"## Part {idx} of {len(notes)}\n\n{note}" for idx, note in enumerate(notes, 1)]
+        message = [
+            {"role": "system", "content": merge_note_system_prompt},
+            {"role": "user", "content": merge_note_user_prompt.format(notes="\n\n".join(sections))}
+        ]
+        logger.info("Merging chunk notes.")
+        return get_completion(message)
+
               
     def pipeline(self):
         """
@@ -71,29 +213,132 @@ class Convo2Slide():
 
         logger.info("Executing convo2slide  pipeline.")
         
-        self.chat = scrape_chat_messages(self.url)
+        self.chat = self.scrape()
         if self.chat == []:
             raise Exception("Empty list of chat messages")
             return None
         
         self.generate_note()
-        if self.note:
-            messages = self.construct_messages(slide_user_prompt, slide_system_prompt)
-            if len(messages) == 0:
-                raise Exception("Empty list of messages")
-                return None
-            
+        slides_data = self.generate_slides()
+
+        logger.info("Successfully executed convo2slide  pipeline.")
+
+        return slides_data
+
+    def generate_slides(self, previous_slides: Optional[dict] = None) -> Optional[dict]:
+        """
+        Generate the slide JSON from the current note.
+
+        Args:
+            previous_slides (Optional[dict]): Slide JSON of an earlier version of the
+                deck. The model is asked to keep slides it does not need to change.
+
+        The response is validated against schema.PRESENTATION_SCHEMA and repaired
+        locally where possible. The model is only asked to fix its answer when
+        the repaired JSON is still invalid.
+
+        Returns:
+            dict: The validated slide JSON.
+
+        Raises:
+            SlideValidationError: If the JSON is still invalid after the fix request.
+        """
+        messages = self.slide_messages(previous_slides)
+        if len(messages) == 0:
+            raise Exception("Empty list of messages")
+
         response = get_completion(messages)
-        try:
-            slides_data = extract_json(response)
-           
-        except Exception as e:
-            logger.error(f"Error parsing topics from response.\nException: {e}")
-            raise
+        slides_data, errors = load_presentation(response)
+
+        if errors:
+            logger.warning(f"Slide JSON could not be repaired, asking the model to fix it: {errors}")
+            # A rerun must not replay the rejected answer from the completion cache
+            forget_completion(messages)
+            messages = messages + [
+                {"role": "assistant", "content": response},
+                {"role": "user", "content": slide_fix_prompt.format(errors="\n".join(f"- {error}" for error in errors))},
+            ]
+            slides_data, errors = load_presentation(get_completion(messages))
+            if errors:
+                logger.error(f"Error parsing slides from response: {errors}")
+                forget_completion(messages)
+                raise SlideValidationError(errors)
+
+        self.slides_data = slides_data
+        return slides_data
+
+    def update_note(self, new_messages: list[dict]):
+        """
+        Extend the current note with the information from newly appended messages.
+
+        Args:
+            new_messages (list): Chat messages appended since the note was generated
+        """
+        logger.info(f"Updating the note with {len(new_messages)} new messages.")
+        message = [
+            {"role": "system", "content": extract_note_system_prompt},
+            {"role": "user", "content": update_note_user_prompt.format(note=self.note, chat_data="\n".join(format_chat(new_messages)))}
+        ]
+
+        note = get_completion(message)
+        if not note:
+            logger.error("empty value for the updated note")
+            raise Exception("Empty note update")
+        self.note = note
+
+    def stream_slides(self, parser: Optional[SlideStreamParser] = None) -> Iterator[dict]:
+        """
+        Execute the pipeline with a streamed slide completion.
+
+        Each slide is yielded as soon as the model has finished writing it, so
+        rendering can overlap with generation. Slides are normalized and
+        validated like in generate_slides before they are yielded. The title
+        and subtitle are available in ``parser.presentation`` by the time the
+        first slide is yielded, and ``self.slides_data`` holds the full
+        validated JSON afterwards.
+
+        Args:
+            parser (Optional[SlideStreamParser]): Parser used for the streamed JSON
+
+        Yields:
+            dict: One slide dictionary at a time.
+
+        Raises:
+            SlideValidationError: If a slide or the full JSON is invalid after repair.
+        """
+        logger.info("Executing streaming convo2slide  pipeline.")
+
+        self.chat = self.scrape()
+        if self.chat == []:
+            raise Exception("Empty list of chat messages")
+
+        self.generate_note()
+        messages = self.slide_messages()
+
+        if parser is None:
+            parser = SlideStreamParser()
+        for index, slide in enumerate(iter_slides(stream_completion(messages), parser)):
+            slide = normalize_slide(slide)
+            errors = validate_slide(slide, index)
+            if errors:
+                logger.error(f"Error parsing a streamed slide: {errors}")
+                # A replayed answer from the completion cache would fail the same way
+                forget_completion(messages)
+                raise SlideValidationError(errors)
+            yield slide
+
+        slides_data = parser.result()
+        if slides_data is None:
+            # The stream ended early or the JSON is malformed, repair it from the full text
+            slides_data, errors = load_presentation(parser.text)
         else:
-            logger.info("Successfully executed convo2slide  pipeline.")
-       
-            return slides_data
+            slides_data = normalize_presentation(slides_data)
+            errors = validate_presentation(slides_data)
+        if errors:
+            logger.error(f"Error parsing slides from the streamed response: {errors}")
+            # stream_completion cached the answer before it could be validated
+            forget_completion(messages)
+            raise SlideValidationError(errors)
+        self.slides_data = slides_data
 
-       
-    
\ No newline at end of file
+        logger.info("Successfully executed streaming convo2slide  pipeline.")
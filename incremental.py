@@ -0,0 +1,212 @@
+import os
+import json
+import copy
+import logging
+import tempfile
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from pptx import Presentation
+
+from cache import CACHE_DIR, ScrapeCache
+from convo import Convo2Slide
+from utility import add_blank_slide, create_content_slide, create_title_slide, new_presentation
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class DeckState(NamedTuple):
+    """
+    Everything kept from the previous run for one URL.
+
+    Attributes:
+        chat: The scraped chat messages.
+        note: The note generated from the chat.
+        slides_data: The slide JSON generated from the note.
+        deck_path: Path of the rendered presentation.
+    """
+    chat: List[dict]
+    note: str
+    slides_data: dict
+    deck_path: Path
+
+
+class DeckStateStore():
+    """
+    Stores the chat, note, slide JSON and rendered deck of the last run per URL.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR / 'state') -> None:
+        self.directory = Path(directory)
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = ScrapeCache.key(url)
+        return self.directory / f"{key}.json", self.directory / f"{key}.pptx"
+
+    def load(self, url: str) -> Optional[DeckState]:
+        """
+        Return the stored state for ``url``, or None if there is no complete state.
+        """
+        state_path, deck_path = self._paths(url)
+        if not state_path.exists() or not deck_path.exists():
+            return None
+
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable deck state for {url}.\nException: {e}")
+            return None
+
+        return DeckState(state['chat'], state['note'], state['slides_data'], deck_path)
+
+    def save(self, url: str, chat: List[dict], note: str, slides_data: dict, presentation):
+        """
+        Store the state of a finished run for ``url``.
+        """
+        state_path, deck_path = self._paths(url)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        presentation.save(str(deck_path))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'chat': chat, 'note': note, 'slides_data': slides_data}, f, ensure_ascii=False)
+        os.replace(tmp_path, state_path)
+
+
+def appended_messages(old_chat: List[dict], new_chat: List[dict]) -> Optional[List[dict]]:
+    """
+    Return the messages appended to a conversation since it was last scraped.
+
+    Args:
+        old_chat (List[dict]): The previously scraped chat messages
+        new_chat (List[dict]): The freshly scraped chat messages
+
+    Returns:
+        Optional[List[dict]]: The appended messages (empty if nothing changed), or
+            None if the old chat is not a prefix of the new one.
+    """
+    if len(new_chat) < len(old_chat) or new_chat[:len(old_chat)] != old_chat:
+        return None
+    return new_chat[len(old_chat):]
+
+
+def copy_slide_shapes(source_slide, target_slide):
+    """
+    Replace the shapes of ``target_slide`` with copies of the shapes of ``source_slide``.
+
+    Only shapes are copied, which is sufficient for the slides rendered by this
+    project because they do not reference images or other related parts.
+    """
+    source_tree = source_slide.shapes._spTree
+    target_tree = target_slide.shapes._spTree
+
+    for element in list(target_tree)[2:]:
+        target_tree.remove(element)
+    # The first two children are the group's non-visual and visual properties
+    for element in list(source_tree)[2:]:
+        target_tree.append(copy.deepcopy(element))
+
+
+def render_incremental(slides_data: dict, previous_slides: Optional[dict] = None, previous_deck=None):
+    """
+    Render a presentation, reusing every slide that is unchanged in the previous deck.
+
+    A content slide is reused when the slide at the same position in the
+    previous slide JSON is identical; the title slide when the title and
+    subtitle are unchanged.
+
+    Args:
+        slides_data (dict): The new slide JSON
+        previous_slides (Optional[dict]): The slide JSON the previous deck was rendered from
+        previous_deck (Optional[Presentation]): The previous deck
+
+    Returns:
+        Presentation: A PowerPoint presentation object
+    """
+    prs, THEME_COLORS = new_presentation()
+
+    presentation_data = slides_data.get('presentation', {})
+    previous_data = (previous_slides or {}).get('presentation', {}) if previous_deck is not None else {}
+    previous_deck_slides = list(previous_deck.slides) if previous_deck is not None else []
+    reused = 0
+
+    if (previous_deck_slides and previous_data.get('title') == presentation_data.get('title')
+            and previous_data.get('subtitle') == presentation_data.get('subtitle')):
+        copy_slide_shapes(previous_deck_slides[0], add_blank_slide(prs, prs.slide_layouts[0]))
+        reused += 1
+    else:
+        create_title_slide(prs, presentation_data, THEME_COLORS)
+
+    previous_content = previous_data.get('slides', [])
+    slides = presentation_data.get('slides', [])
+    for idx, slide_data in enumerate(slides, 1):
+        if (idx < len(previous_deck_slides) and idx <= len(previous_content)
+                and previous_content[idx - 1] == slide_data):
+            copy_slide_shapes(previous_deck_slides[idx], add_blank_slide(prs, prs.slide_layouts[1]))
+            reused += 1
+        else:
+            create_content_slide(prs, slide_data, idx, THEME_COLORS)
+
+    logger.info(f"Reused {reused} of {len(slides) + 1} slides from the previous deck")
+    return prs
+
+
+def incremental_pipeline(convo2slide: Convo2Slide, store: Optional[DeckStateStore] = None):
+    """
+    Execute the pipeline, only regenerating what changed since the last run.
+
+    If the conversation only had messages appended, the note is updated with
+    the new messages instead of being regenerated, and unchanged slides are
+    copied from the previous deck. Without a usable previous state the full
+    pipeline runs. The conversation is always scraped again, ignoring the
+    scrape cache, and the fresh copy is written to the cache.
+
+    Args:
+        convo2slide (Convo2Slide): The pipeline for the conversation URL
+        store (Optional[DeckStateStore]): Where the previous run is stored
+
+    Returns:
+        Tuple[dict, Presentation]: The slide JSON and the rendered presentation
+    """
+    if store is None:
+        store = DeckStateStore()
+
+    url = convo2slide.url
+    state = store.load(url)
+
+    # The cached chat would hide the appended messages this mode looks for, and
+    # the previous chat is kept in the deck state anyway
+    convo2slide.chat = convo2slide.scrape(refresh=True)
+    if convo2slide.chat == []:
+        raise Exception("Empty list of chat messages")
+
+    delta = appended_messages(state.chat, convo2slide.chat) if state else None
+    if delta is None:
+        logger.info("No usable previous run, executing the full pipeline.")
+        convo2slide.generate_note()
+        slides_data = convo2slide.generate_slides()
+        if not slides_data:
+            raise Exception("No slide JSON in the response")
+        presentation = render_incremental(slides_data)
+    elif not delta:
+        logger.info("Conversation unchanged, reusing the previous deck.")
+        convo2slide.note = state.note
+        convo2slide.slides_data = state.slides_data
+        return state.slides_data, Presentation(str(state.deck_path))
+    else:
+        convo2slide.note = state.note
+        convo2slide.update_note(delta)
+        slides_data = convo2slide.generate_slides(previous_slides=state.slides_data)
+        if not slides_data:
+            raise Exception("No slide JSON in the response")
+        presentation = render_incremental(slides_data, state.slides_data, Presentation(str(state.deck_path)))
+
+    store.save(url, convo2slide.chat, convo2slide.note, slides_data, presentation)
+    return slides_data, presentation
@@ -0,0 +1,399 @@
+import os
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from math import ceil
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+from metrics import get_font_metrics
+from model import Presentation, as_presentation, as_slide
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+LAYOUT_CACHE_SIZE = int(os.environ.get("LAYOUT_CACHE_SIZE", 16384))
+
+# Left plus right inset of a python-pptx text frame, in inches
+TEXT_FRAME_INSET = 0.2
+LINE_SPACING = 1.2
+
+# Content area of a content slide, in inches and points
+CONTENT_MAX_FONT_SIZE = 20
+CONTENT_MIN_FONT_SIZE = 14
+CONTENT_MAX_HEIGHT = 4.5
+PARAGRAPH_WIDTH = 12
+BULLET_WIDTH = 12
+PARAGRAPH_SPACING = 0.3
+BULLET_SPACING = 0.1
+BULLET_PREFIX = "• "
+
+CONTENT_FONT_SIZES = tuple(range(CONTENT_MIN_FONT_SIZE, CONTENT_MAX_FONT_SIZE + 1))
+CONTENT_TOP = 1.8
+SLIDE_TITLE_FONT_SIZE = 44
+SLIDE_TITLE_WIDTH = 12
+
+# Title and subtitle boxes of the title slide
+TITLE_WIDTH = 11
+TITLE_MAX_HEIGHT = 1.5
+TITLE_FONT_SIZES = tuple(range(32, 55, 2))
+SUBTITLE_MAX_HEIGHT = 2
+SUBTITLE_FONT_SIZES = tuple(range(24, 33, 2))
+
+
+def wrap_line_count(widths: Sequence[int], offsets: Sequence[int], space: int, limit: float) -> int:
+    """
+    Count the lines of greedily wrapped words, jumping a whole line at a time.
+
+    Each line end is found with a binary search over the running word offsets
+    instead of walking every word. A word wider than a line is broken over as
+    many lines as it needs.
+
+    Args:
+        widths (Sequence[int]): Width of every word
+        offsets (Sequence[int]): ``offsets[k]`` is the sum of ``width + space`` over the first k words
+        space (int): Width of a space
+        limit (float): Width of a line, in the same unit
+
+    Returns:
+        int: The number of lines.
+    """
+    count = len(widths)
+    if not count:
+        return 1
+
+    lines = 0
+    start = 0
+    while start < count:
+        # Words start..end-1 fit if their widths plus the spaces between them fit
+        end = bisect_right(offsets, offsets[start] + limit + space) - 1
+        if end > start:
+            lines += 1
+            start = end
+        else:
+            lines += max(1, ceil(widths[start] / limit))
+            start += 1
+    return lines
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def line_counts(text: str, width_inches: float, font_sizes: Tuple[int, ...] = CONTENT_FONT_SIZES,
+                bold: bool = False) -> Tuple[int, ...]:
+    """
+    Count the wrapped lines of a text for several font sizes at once.
+
+    Word widths are measured once with the real advance widths of the
+    measuring font (see metrics.py) and shared by every font size, since they
+    scale with it. Line breaks in the text start new lines. Results are cached
+    by text, width, sizes and weight.
+
+    Args:
+        text (str): The text to wrap
+        width_inches (float): Width of the text box in inches
+        font_sizes (Tuple[int, ...]): Font sizes in points
+        bold (bool): Measure with the bold font
+
+    Returns:
+        Tuple[int, ...]: The number of lines for each font size, in order.
+    """
+    metrics = get_font_metrics(bold)
+    space = metrics.space_width
+    # Line widths in 1/1000 em for every font size
+    limits = [(width_inches - TEXT_FRAME_INSET) * 72 * 1000 / size for size in font_sizes]
+
+    counts = [0] * len(font_sizes)
+    for line in text.split('\n'):
+        widths = metrics.word_widths(line.split())
+        offsets = list(accumulate(map(space.__add__, widths), initial=0))
+        total = offsets[-1] - space
+        for i, limit in enumerate(limits):
+            # Most bullet points fit on one line at every size
+            counts[i] += 1 if total <= limit else wrap_line_count(widths, offsets, space, limit)
+    return tuple(counts)
+
+
+def text_height(text: str, font_size: int, width_inches: float,
+                font_sizes: Tuple[int, ...] = CONTENT_FONT_SIZES, bold: bool = False) -> float:
+    """
+    Return the height in inches a text needs in a box of the given width.
+
+    ``font_size`` should be one of ``font_sizes`` so the cached line counts are
+    reused; other sizes are counted separately.
+    """
+    if font_size not in font_sizes:
+        font_sizes = (font_size,)
+    lines = line_counts(text, width_inches, font_sizes, bold)[font_sizes.index(font_size)]
+    return (lines * font_size * LINE_SPACING) / 72
+
+
+def _content_height(paragraph_lines: Optional[Tuple[int, ...]], bullet_lines: List[Tuple[int, ...]],
+                    index: int, font_size: int) -> float:
+    total_height = 0
+
+    if paragraph_lines is not None:
+        total_height += (paragraph_lines[index] * font_size * LINE_SPACING) / 72
+        total_height += PARAGRAPH_SPACING
+
+    for lines in bullet_lines:
+        total_height += (lines[index] * font_size * LINE_SPACING) / 72
+        total_height += BULLET_SPACING
+
+    return total_height
+
+
+def _content_lines(paragraph_text: str, bullet_points: Sequence[str], font_sizes: Tuple[int, ...]):
+    paragraph_lines = line_counts(paragraph_text, PARAGRAPH_WIDTH, font_sizes) if paragraph_text else None
+    bullet_lines = [line_counts(f"{BULLET_PREFIX}{point}", BULLET_WIDTH, font_sizes) for point in bullet_points or []]
+    return paragraph_lines, bullet_lines
+
+
+def content_height(paragraph_text: str, bullet_points: Sequence[str], font_size: int) -> float:
+    """
+    Return the height in inches of a slide's paragraph and bullet points.
+    """
+    font_sizes = CONTENT_FONT_SIZES if font_size in CONTENT_FONT_SIZES else (font_size,)
+    paragraph_lines, bullet_lines = _content_lines(paragraph_text, bullet_points, font_sizes)
+    return _content_height(paragraph_lines, bullet_lines, font_sizes.index(font_size), font_size)
+
+
+def _largest_fitting(font_sizes: Tuple[int, ...], too_tall) -> int:
+    # Heights grow with the font size, so binary search for the largest size
+    # that fits, falling back to the smallest size
+    low, high = 1, len(font_sizes) - 1
+    best = font_sizes[0]
+    while low <= high:
+        middle = (low + high) // 2
+        if too_tall(middle):
+            high = middle - 1
+        else:
+            best = font_sizes[middle]
+            low = middle + 1
+    return best
+
+
+def fit_font_size(paragraph_text: str, bullet_points: Sequence[str],
+                  max_height: float = CONTENT_MAX_HEIGHT,
+                  font_sizes: Tuple[int, ...] = CONTENT_FONT_SIZES) -> int:
+    """
+    Return the largest font size at which the slide content fits.
+
+    Every text is measured once for all font sizes, then the sizes are binary
+    searched. Falls back to the smallest size if nothing fits.
+
+    Args:
+        paragraph_text (str): Main paragraph text content
+        bullet_points (Sequence[str]): Bullet point texts, without the bullet
+        max_height (float): Available height in inches
+        font_sizes (Tuple[int, ...]): Candidate font sizes in ascending order
+
+    Returns:
+        int: The font size in points.
+    """
+    paragraph_lines, bullet_lines = _content_lines(paragraph_text, bullet_points, font_sizes)
+    return _largest_fitting(font_sizes, lambda index: _content_height(
+        paragraph_lines, bullet_lines, index, font_sizes[index]) > max_height)
+
+
+def fit_text_size(text: str, width_inches: float, max_height: float, font_sizes: Tuple[int, ...],
+                  bold: bool = False) -> int:
+    """
+    Return the largest font size at which a single text fits in a box.
+
+    Args:
+        text (str): The text
+        width_inches (float): Width of the text box in inches
+        max_height (float): Height of the text box in inches
+        font_sizes (Tuple[int, ...]): Candidate font sizes in ascending order
+        bold (bool): Measure with the bold font
+
+    Returns:
+        int: The font size in points, or the smallest size if nothing fits.
+    """
+    lines = line_counts(text, width_inches, font_sizes, bold)
+    return _largest_fitting(font_sizes, lambda index: (
+        lines[index] * font_sizes[index] * LINE_SPACING) / 72 > max_height)
+
+
+def clear_layout_cache():
+    """
+    Drop the cached line counts.
+    """
+    line_counts.cache_clear()
+
+
+def wrap_lines(text: str, width_inches: float, font_size: int, bold: bool = False) -> List[str]:
+    """
+    Wrap a text into lines the way line_counts counts them.
+
+    Words are placed greedily, line breaks in the text start new lines and a
+    word wider than a line is broken between characters. Renderers that draw
+    text themselves (PDF) use the lines as they are.
+
+    Args:
+        text (str): The text to wrap
+        width_inches (float): Width of the text box in inches
+        font_size (int): Font size in points
+        bold (bool): Measure with the bold font
+
+    Returns:
+        List[str]: The lines, without trailing spaces.
+    """
+    metrics = get_font_metrics(bold)
+    space = metrics.space_width
+    limit = (width_inches - TEXT_FRAME_INSET) * 72 * 1000 / font_size
+
+    lines = []
+    for paragraph in text.split('\n'):
+        words = paragraph.split()
+        line: List[str] = []
+        line_width = 0
+        for word, width in zip(words, metrics.word_widths(words)):
+            if line and line_width + space + width <= limit:
+                line.append(word)
+                line_width += space + width
+                continue
+            if line:
+                lines.append(" ".join(line))
+            if width <= limit:
+                line, line_width = [word], width
+                continue
+
+            # Break the word over as many lines as it needs, like wrap_line_count
+            piece, piece_width = "", 0
+            for char in word:
+                char_width = metrics.word_width(char)
+                if piece and piece_width + char_width > limit:
+                    lines.append(piece)
+                    piece, piece_width = "", 0
+                piece += char
+                piece_width += char_width
+            lines.append(piece)
+            line, line_width = [], 0
+        if line or not words:
+            lines.append(" ".join(line))
+    return lines
+
+
+@dataclass(slots=True)
+class TitleSlideLayout:
+    """
+    Text and font sizes of the title slide.
+
+    ``title_lines`` and ``subtitle_lines`` are only filled in when wrapping
+    was requested.
+    """
+    title: str
+    subtitle: str
+    title_font_size: int
+    subtitle_font_size: int
+    title_lines: Optional[List[str]] = None
+    subtitle_lines: Optional[List[str]] = None
+
+
+@dataclass(slots=True)
+class ContentSlideLayout:
+    """
+    Text, font size and positions of a content slide, in points and inches.
+
+    ``*_lines`` are only filled in when wrapping was requested; bullet lines
+    start with BULLET_PREFIX.
+    """
+    number: int
+    title: str
+    paragraph: str
+    bullet_points: Tuple[str, ...]
+    font_size: int
+    paragraph_height: float
+    title_lines: Optional[List[str]] = None
+    paragraph_lines: Optional[List[str]] = None
+    bullet_lines: Optional[List[List[str]]] = None
+
+    @property
+    def bullets_top(self) -> float:
+        """Top of the bullet points in inches."""
+        if not self.paragraph:
+            return CONTENT_TOP
+        return CONTENT_TOP + self.paragraph_height + PARAGRAPH_SPACING
+
+
+@dataclass(slots=True)
+class DeckLayout:
+    """The layout of every slide of a deck, shared by all output formats."""
+    title: TitleSlideLayout
+    slides: List[ContentSlideLayout]
+
+
+def layout_title_slide(presentation_data, wrap: bool = False) -> TitleSlideLayout:
+    """
+    Fit the title and subtitle of the title slide.
+
+    Args:
+        presentation_data (dict or model.Presentation): Presentation title and subtitle
+        wrap (bool): Also wrap the texts into lines
+
+    Returns:
+        TitleSlideLayout: The title slide layout.
+    """
+    if isinstance(presentation_data, Mapping):
+        title = presentation_data.get('title', 'Presentation Title')
+        subtitle = presentation_data.get('subtitle', '')
+    else:
+        title = presentation_data.title if presentation_data.title is not None else 'Presentation Title'
+        subtitle = presentation_data.subtitle
+
+    title_font_size = fit_text_size(title, TITLE_WIDTH, TITLE_MAX_HEIGHT, TITLE_FONT_SIZES, bold=True)
+    subtitle_font_size = fit_text_size(subtitle, TITLE_WIDTH, SUBTITLE_MAX_HEIGHT, SUBTITLE_FONT_SIZES)
+    text_layout = TitleSlideLayout(title, subtitle, title_font_size, subtitle_font_size)
+    if wrap:
+        text_layout.title_lines = wrap_lines(title, TITLE_WIDTH, title_font_size, bold=True)
+        text_layout.subtitle_lines = wrap_lines(subtitle, TITLE_WIDTH, subtitle_font_size)
+    return text_layout
+
+
+def layout_content_slide(slide_data, number: int, wrap: bool = False) -> ContentSlideLayout:
+    """
+    Fit the content of a content slide.
+
+    Args:
+        slide_data (dict or model.Slide): The slide
+        number (int): Slide number, also the title of an untitled slide
+        wrap (bool): Also wrap the texts into lines
+
+    Returns:
+        ContentSlideLayout: The content slide layout.
+    """
+    slide = as_slide(slide_data)
+    title = slide.title if slide.title is not None else f'Slide {number}'
+    font_size = fit_font_size(slide.paragraph, slide.bullet_points)
+    paragraph_height = text_height(slide.paragraph, font_size, PARAGRAPH_WIDTH) if slide.paragraph else 0.0
+
+    text_layout = ContentSlideLayout(number, title, slide.paragraph, slide.bullet_points, font_size, paragraph_height)
+    if wrap:
+        text_layout.title_lines = wrap_lines(title, SLIDE_TITLE_WIDTH, SLIDE_TITLE_FONT_SIZE, bold=True)
+        text_layout.paragraph_lines = wrap_lines(slide.paragraph, PARAGRAPH_WIDTH, font_size) if slide.paragraph else []
+        text_layout.bullet_lines = [wrap_lines(f"{BULLET_PREFIX}{point}", BULLET_WIDTH, font_size)
+                                    for point in slide.bullet_points]
+    return text_layout
+
+
+def layout_presentation(json_data, wrap: bool = False) -> DeckLayout:
+    """
+    Compute the layout of a whole deck once for every output format.
+
+    Args:
+        json_data (dict or model.Presentation): The slide JSON or the presentation model
+        wrap (bool): Also wrap the texts into lines, for renderers that draw text themselves
+
+    Returns:
+        DeckLayout: The layout of the title slide and of every content slide.
+    """
+    deck: Presentation = as_presentation(json_data)
+    return DeckLayout(layout_title_slide(deck, wrap),
+                      [layout_content_slide(slide, number, wrap) for number, slide in enumerate(deck.slides, 1)])
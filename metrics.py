@@ -0,0 +1,183 @@
+import os
+import sys
+import hashlib
+import logging
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import reportlab
+from cache import CACHE_DIR
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+REPORTLAB_FONTS = Path(reportlab.__file__).parent / 'fonts'
+
+# TrueType fonts used to measure regular and bold text. A bare file name is
+# looked up in the fonts bundled with reportlab. Point these at a Calibri
+# compatible font (e.g. Carlito) to match the default PowerPoint theme exactly.
+METRICS_FONT = os.environ.get("METRICS_FONT", "Vera.ttf")
+METRICS_BOLD_FONT = os.environ.get("METRICS_BOLD_FONT", "VeraBd.ttf")
+METRICS_CACHE_DIR = CACHE_DIR / 'fonts'
+
+# Widths are stored for the Basic Multilingual Plane in 1/1000 em
+_TABLE_SIZE = 0x10000
+# Number of distinct words whose widths are remembered per font
+WORD_CACHE_SIZE = int(os.environ.get("METRICS_WORD_CACHE_SIZE", 100000))
+
+_lock = threading.Lock()
+_loaded: Dict[bool, "FontMetrics"] = {}
+
+
+class FontMetrics():
+    """
+    Advance widths of a font, indexed by code point.
+
+    Attributes:
+        name: Name of the font file.
+        widths: ``array('H')`` of advance widths in 1/1000 em for every code
+            point of the Basic Multilingual Plane. Characters missing from the
+            font have the font's default width.
+        default_width: Width used for characters outside the table.
+    """
+
+    def __init__(self, name: str, widths: array, default_width: int) -> None:
+        self.name = name
+        self.widths = widths
+        self.default_width = default_width
+        self.space_width = widths[32]
+        self._width_of = widths.__getitem__
+        self._word_widths = _WordWidths(self._measure)
+
+    @classmethod
+    def from_ttf(cls, path: Path) -> "FontMetrics":
+        """
+        Read the advance widths of a TrueType font with reportlab.
+        """
+        from reportlab.pdfbase.ttfonts import TTFontFile
+
+        font = TTFontFile(str(path))
+        default_width = round(font.defaultWidth)
+        widths = array('H', [default_width]) * _TABLE_SIZE
+        for code, width in font.charWidths.items():
+            if code < _TABLE_SIZE:
+                widths[code] = round(width)
+        return cls(path.name, widths, default_width)
+
+    @classmethod
+    def load(cls, path: Path, cache_dir: Optional[Path] = METRICS_CACHE_DIR) -> "FontMetrics":
+        """
+        Load the widths of a font, from the width table cache if possible.
+
+        Parsing a TrueType font takes tens of milliseconds, reading the cached
+        table a fraction of one. The cache entry is keyed by the font file's
+        path, size and modification time.
+        """
+        if cache_dir is None:
+            return cls.from_ttf(path)
+
+        stat = path.stat()
+        key = hashlib.sha256(f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+        cache_path = Path(cache_dir) / f"{path.stem}-{key}.widths"
+
+        try:
+            with open(cache_path, 'rb') as f:
+                table = array('H')
+                table.fromfile(f, _TABLE_SIZE + 1)
+            if sys.byteorder != 'little':
+                table.byteswap()
+            return cls(path.name, table[:_TABLE_SIZE], table[_TABLE_SIZE])
+        except (OSError, EOFError):
+            pass
+
+        metrics = cls.from_ttf(path)
+        try:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            table = metrics.widths + array('H', [metrics.default_width])
+            if sys.byteorder != 'little':
+                table.byteswap()
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                table.tofile(f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache the widths of {path.name}.\nException: {e}")
+        return metrics
+
+    def _measure(self, word: str) -> int:
+        try:
+            return sum(map(self._width_of, map(ord, word)))
+        except IndexError:
+            # Characters outside the Basic Multilingual Plane
+            return sum(self.widths[code] if code < _TABLE_SIZE else self.default_width
+                       for code in map(ord, word))
+
+    def word_width(self, word: str) -> int:
+        """
+        Return the advance width of a word in 1/1000 em.
+        """
+        return self._word_widths[word]
+
+    def word_widths(self, words: List[str]) -> List[int]:
+        """
+        Return the advance widths of several words in 1/1000 em.
+
+        Words repeat a lot in prose, so their widths are remembered and most
+        lookups are a single dict access.
+        """
+        if len(self._word_widths) > WORD_CACHE_SIZE:
+            self._word_widths.clear()
+        return list(map(self._word_widths.__getitem__, words))
+
+
+class _WordWidths(dict):
+    """Maps a word to its width, measuring words on first lookup."""
+
+    def __init__(self, measure) -> None:
+        super().__init__()
+        self._measure = measure
+
+    def __missing__(self, word: str) -> int:
+        width = self[word] = self._measure(word)
+        return width
+
+
+def font_path(name: str) -> Path:
+    """
+    Resolve a font setting to a file, looking bare names up in reportlab's fonts.
+    """
+    path = Path(name)
+    if not path.is_absolute() and not path.exists():
+        path = REPORTLAB_FONTS / name
+    return path
+
+
+def get_font_metrics(bold: bool = False) -> FontMetrics:
+    """
+    Return the metrics of the measuring font, loading them on first use.
+
+    Args:
+        bold (bool): Return the bold font (METRICS_BOLD_FONT) instead of METRICS_FONT
+
+    Returns:
+        FontMetrics: The shared metrics of the font.
+    """
+    metrics = _loaded.get(bold)
+    if metrics is not None:
+        return metrics
+
+    with _lock:
+        metrics = _loaded.get(bold)
+        if metrics is None:
+            metrics = FontMetrics.load(font_path(METRICS_BOLD_FONT if bold else METRICS_FONT))
+            _loaded[bold] = metrics
+    return metrics
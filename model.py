@@ -0,0 +1,121 @@
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from pptx.dml.color import RGBColor
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Theme colors of every deck. The colors are immutable and shared by all
+# presentations instead of being created per deck.
+THEME_COLORS: Mapping[str, RGBColor] = MappingProxyType({
+    'primary': RGBColor(0, 75, 135),
+    'secondary': RGBColor(240, 240, 240),
+    'accent': RGBColor(255, 127, 0),
+    'text': RGBColor(51, 51, 51),
+    'background': RGBColor(248, 248, 248),
+})
+
+# Bullet points containing one of these are set off as formulas
+FORMULA_CHARACTERS = ("=", "+", "^", "*", "/")
+
+
+def bullet_color(text: str, theme_colors: Mapping[str, RGBColor] = THEME_COLORS) -> RGBColor:
+    """Return the text color of a bullet point: the accent color for formulas."""
+    if any(char in text for char in FORMULA_CHARACTERS):
+        return theme_colors['accent']
+    return theme_colors['text']
+
+
+@dataclass(slots=True)
+class Slide:
+    """
+    One content slide.
+
+    Attributes:
+        title: Slide title, or None to number the slide instead.
+        paragraph: Main paragraph, empty for none.
+        bullet_points: Bullet point texts, without the bullet.
+    """
+    title: Optional[str] = None
+    paragraph: str = ""
+    bullet_points: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Slide":
+        """
+        Build a slide from a ``slides`` entry of the slide JSON.
+
+        The JSON is expected to be validated already (see schema.py), so the
+        values are taken as they are; a missing or null paragraph or bullet
+        list is left empty.
+        """
+        return cls(data.get('title'), data.get('paragraph') or '', tuple(data.get('bullet_points') or ()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the slide as a ``slides`` entry of the slide JSON."""
+        data = {"paragraph": self.paragraph, "bullet_points": list(self.bullet_points)}
+        if self.title is not None:
+            data = {"title": self.title, **data}
+        return data
+
+
+@dataclass(slots=True)
+class Presentation:
+    """
+    A deck: the title slide text and the content slides.
+
+    The one representation of the slide JSON and of the XML topics of
+    parse_topics; the renderers in utility.py take it as well as the JSON.
+
+    Attributes:
+        title: Title of the title slide, or None for the default title.
+        subtitle: Subtitle of the title slide.
+        slides: Content slides in order.
+    """
+    title: Optional[str] = None
+    subtitle: str = ""
+    slides: List[Slide] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, json_data: Mapping[str, Any]) -> "Presentation":
+        """
+        Build a presentation from the slide JSON.
+
+        Accepts both the whole document and its ``presentation`` object.
+        """
+        data = json_data.get('presentation', json_data)
+        return cls(data.get('title'), data.get('subtitle', ''),
+                   [Slide.from_dict(slide) for slide in data.get('slides', ())])
+
+    @classmethod
+    def from_topics(cls, title: str, subtitle: str, topics: Sequence[Mapping[str, Any]]) -> "Presentation":
+        """
+        Build a presentation from the output of utility.parse_topics.
+        """
+        return cls(title, subtitle, [Slide(topic['title'], "", tuple(topic.get('points', ()))) for topic in topics])
+
+    def to_json(self) -> Dict[str, Any]:
+        """Return the presentation as slide JSON."""
+        data = {"subtitle": self.subtitle, "slides": [slide.to_dict() for slide in self.slides]}
+        if self.title is not None:
+            data = {"title": self.title, **data}
+        return {"presentation": data}
+
+
+def as_slide(slide: Union[Slide, Mapping[str, Any]]) -> Slide:
+    """Return a slide as a Slide, converting a JSON dict and passing a Slide through."""
+    return slide if isinstance(slide, Slide) else Slide.from_dict(slide)
+
+
+def as_presentation(presentation: Union[Presentation, Mapping[str, Any]]) -> Presentation:
+    """Return a presentation as a Presentation, converting slide JSON and passing a Presentation through."""
+    return presentation if isinstance(presentation, Presentation) else Presentation.from_json(presentation)
@@ -0,0 +1,178 @@
+import os
+import logging
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from pptx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM, RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, _Relationship
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.serialized import _ContentTypesItem
+
+from tracing import span
+from model import Presentation, Slide, as_presentation
+from utility import create_content_slide, create_title_slide, new_presentation
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+PPTX_COMPRESSION = int(os.environ.get("PPTX_COMPRESSION", 6))
+
+
+class _WrittenPart(Part):
+    """Stands in for a slide part whose XML is already in the zip.
+
+    Keeps the part name and content type for [Content_Types].xml and the
+    presentation relationships, but none of the slide's XML.
+    """
+
+    def __init__(self, part: Part) -> None:
+        super().__init__(part.partname, part.content_type, part.package)
+
+
+class StreamingPptxWriter():
+    """
+    Write a presentation to a .pptx file one slide at a time.
+
+    Every slide is rendered with the usual slide functions, written to the
+    zip right away and then released, so memory does not grow with the deck.
+    The presentation part, layouts, theme and [Content_Types].xml are written
+    at close, once all slides are known. The file is built next to ``path``
+    and only moved into place by a successful close.
+
+    Apart from the order of the zip entries, the file is the same as
+    ``create_presentation(...).save(path)``.
+
+    Usage:
+        with StreamingPptxWriter(path) as writer:
+            writer.add_title_slide(presentation_data)
+            for slide_data in slides:
+                writer.add_slide(slide_data)
+    """
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self.prs, self.theme_colors = new_presentation()
+        self.slide_count = 0
+
+        fd, self._tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix='.tmp')
+        os.close(fd)
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=PPTX_COMPRESSION)
+
+    def __enter__(self) -> "StreamingPptxWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add_title_slide(self, presentation_data: Union[dict, Presentation]) -> None:
+        """Render the title slide and write it to the file."""
+        create_title_slide(self.prs, presentation_data, self.theme_colors)
+        self._write_last_slide()
+
+    def add_slide(self, slide_data: Union[dict, Slide]) -> None:
+        """Render the next content slide and write it to the file."""
+        create_content_slide(self.prs, slide_data, self.slide_count, self.theme_colors)
+        self._write_last_slide()
+
+    def _write_last_slide(self) -> None:
+        presentation_part = self.prs.part
+        rId = self.prs.slides._sldIdLst.sldId_lst[-1].rId
+        slide_part = presentation_part.related_part(rId)
+
+        self._zip.writestr(slide_part.partname.membername, slide_part.blob)
+        self._zip.writestr(slide_part.partname.rels_uri.membername, slide_part.rels.xml)
+        # Point the relationship at a stub so the rendered slide can be freed
+        rels = presentation_part.rels
+        rels._rels[rId] = _Relationship(rels._base_uri, rId, RT.SLIDE, RTM.INTERNAL, _WrittenPart(slide_part))
+        self.slide_count += 1
+
+    def close(self) -> None:
+        """Write the remaining parts and move the file into place."""
+        package = self.prs.part.package
+        parts = list(package.iter_parts())
+
+        with span("write_pptx", slides=self.slide_count):
+            for part in parts:
+                if isinstance(part, _WrittenPart):
+                    continue
+                self._zip.writestr(part.partname.membername, part.blob)
+                if part._rels:
+                    self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+            self._zip.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+            self._zip.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+            self._zip.close()
+
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp_path, 0o666 & ~umask)
+        os.replace(self._tmp_path, self.path)
+        logger.info(f"Wrote {self.slide_count} slides to {self.path}")
+
+    def abort(self) -> None:
+        """Discard the partially written file."""
+        self._zip.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+def write_presentation_stream(path, presentation_data: Union[dict, Presentation],
+                              slides: Iterable[Union[dict, Slide]]) -> int:
+    """
+    Write a presentation to ``path`` while the slides are still being generated.
+
+    The streaming counterpart of utility.create_presentation_from_stream: the
+    title slide is written once the first slide arrives, so
+    ``presentation_data`` may be filled in while the stream is consumed (see
+    slide_stream.SlideStreamParser.presentation), and each slide is on disk as
+    soon as it is rendered.
+
+    Args:
+        path: Output .pptx path
+        presentation_data (dict or model.Presentation): Presentation title and subtitle
+        slides (Iterable[dict or model.Slide]): Slide data, in order
+
+    Returns:
+        int: The number of slides written, including the title slide.
+    """
+    with span("create_presentation", streaming=True) as s, StreamingPptxWriter(path) as writer:
+        slides = iter(slides)
+        first_slide: Optional[Union[dict, Slide]] = next(slides, None)
+
+        writer.add_title_slide(presentation_data)
+        if first_slide is not None:
+            writer.add_slide(first_slide)
+            for slide_data in slides:
+                writer.add_slide(slide_data)
+
+        s.set_attribute("slides", writer.slide_count)
+
+    return writer.slide_count
+
+
+def write_presentation(path, json_data: Union[dict, Presentation]) -> int:
+    """
+    Write a presentation from JSON data to ``path``, one slide at a time.
+
+    Args:
+        path: Output .pptx path
+        json_data (dict or model.Presentation): JSON data containing presentation content and structure
+
+    Returns:
+        int: The number of slides written, including the title slide.
+    """
+    deck = as_presentation(json_data)
+    return write_presentation_stream(path, deck, deck.slides)
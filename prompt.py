@@ -318,10 +318,122 @@ The integration of AI into healthcare undeniably presents transformative opportu
 """
 
 
+merge_note_system_prompt = """
+You are an advanced knowledge synthesis AI. You merge partial analyses of one long conversation into a single, detailed and well-structured note without losing any information.
+"""
+
+merge_note_user_prompt = """
+# **Note Merging Instructions**
+
+The conversation below was too long to analyze at once, so it was split into consecutive parts and each part was analyzed separately. The notes for every part are given in conversation order.
 
+## **Instructions**
+1. Merge the notes into ONE note that follows the same structure as the individual notes.
+2. Keep EVERY detail, example, formula and data point from every part. Do not summarize away specifics.
+3. Combine themes that span several parts into a single section instead of repeating them.
+4. Preserve the order in which topics were introduced in the conversation.
+5. Do not mention the parts or the splitting in the merged note.
+
+## **Notes**
+
+{notes}
+"""
 
 
+slide_user_prompt_compact = """
+# **Structured Content Transformation Prompt (Compact)**
+
+Transform the unstructured notes given after `** input**` into a presentation JSON.
+
+## **Rules**
+- `title`: ≤ 5 words, noun phrase capturing the primary theme.
+- `subtitle`: the supporting themes as 3-7 word phrases separated by " | ".
+- Slides: an "Introduction" slide previewing ALL topics, one slide per distinct topic in a logical order (Foundation → Applications → Challenges), and a "Conclusion" slide with cross-topic insights and concrete next steps.
+- `paragraph`: multi-sentence and highly detailed: definitions, processes, examples, context, nuances and edge cases.
+- `bullet_points`: detailed, informative statements, not keywords.
+- Capture EVERY formula (as a plain string, never LaTeX), numerical value with its unit, methodological step and comparative statement from the notes. Do not merge unrelated concepts and do not drop any detail.
+
+## **Schema**
+```json
+{
+  "presentation": {
+    "title": "[Primary Theme]",
+    "subtitle": "[Theme 1] | [Theme 2] | [Theme 3]",
+    "slides": [
+      {
+        "title": "[Slide Title]",
+        "paragraph": "[Detailed explanation]",
+        "bullet_points": ["[Detailed point]", "[Detailed point]"]
+      }
+    ]
+  }
+}
+```
+
+Return only the JSON.
+"""
 
 
+extract_note_user_prompt_compact = """
+# **Knowledge Extraction and Synthesis (Compact)**
 
+Produce a standalone, highly detailed analysis of the chat transcript below, so that someone who has not read it understands every idea in depth.
 
+## **Instructions**
+- Read the transcript in three passes: identify themes, extract every detail, then validate everything against the transcript.
+- Capture ALL formulas, equations and calculations with their components explained, plus every example, data point, methodology, ambiguity and open question.
+- Group related ideas into clear topics, keep subtle distinctions, and explain the connections between topics.
+- Use only the transcript; do not add external knowledge unless essential to explain something it mentions.
+
+## **Output**
+- **Topic Analysis:** each topic with detailed explanations, examples and formulas.
+- **Concept Map:** the key concepts and how they relate.
+- **Key Insights:** primary concepts and critical takeaways with supporting details.
+- **Conclusion:** a synthesis of the whole conversation.
+
+<chat_transcription>
+{chat_data}
+</chat_transcription>
+"""
+
+
+update_note_user_prompt = """
+# **Note Update Instructions**
+
+A detailed note was already extracted from the first part of a conversation. New messages have since been appended to the conversation.
+
+## **Instructions**
+1. Return the COMPLETE updated note, keeping the structure of the existing note.
+2. Keep every detail of the existing note unless the new messages correct or extend it.
+3. Integrate every detail, example, formula and data point from the new messages into the matching sections, adding new sections for new topics.
+4. Leave sections that the new messages do not touch word for word unchanged.
+
+## **Existing Note**
+
+<existing_note>
+{note}
+</existing_note>
+
+## **New Messages**
+
+<chat_transcription>
+{chat_data}
+</chat_transcription>
+"""
+
+slide_update_prompt = """
+
+** previous slides**
+
+The JSON below is the previous version of this presentation, generated before the notes were updated. Keep every slide whose content is not affected by the updated notes EXACTLY as it is, character for character and in the same position, and only change or add the slides that need it.
+
+{previous_slides}
+"""
+
+slide_fix_prompt = """
+The JSON in your previous answer does not match the required schema:
+
+{errors}
+
+Return the COMPLETE corrected JSON, following the schema exactly, and nothing else.
+"""
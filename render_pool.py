@@ -0,0 +1,144 @@
+import os
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from lxml import etree
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.parts.slide import SlidePart
+
+from tracing import span
+from layout import ContentSlideLayout, DeckLayout
+from model import Slide, as_presentation
+from utility import create_content_slide, create_title_slide, new_presentation
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+# Smaller decks render faster serially than the pool round trip takes
+PARALLEL_RENDER_MIN_SLIDES = int(os.environ.get("PARALLEL_RENDER_MIN_SLIDES", 50))
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def render_slide_chunk(slides: List[Slide], first_idx: int,
+                       layouts: Optional[List[ContentSlideLayout]] = None) -> List[bytes]:
+    """
+    Render content slides in a scratch presentation and return their slide XML.
+
+    Runs in a worker process. The slides are rendered with create_content_slide
+    exactly as in serial mode, numbered from ``first_idx``.
+
+    Args:
+        slides (List[Slide]): Slide data
+        first_idx (int): Slide number of the first slide
+        layouts (Optional[List[ContentSlideLayout]]): Precomputed layout of every
+            slide, so the worker does not fit the text again
+
+    Returns:
+        List[bytes]: The serialized slide part of every slide.
+    """
+    prs, THEME_COLORS = new_presentation()
+    for offset, slide_data in enumerate(slides):
+        create_content_slide(prs, slide_data, first_idx + offset, THEME_COLORS,
+                             layouts[offset] if layouts else None)
+    return [etree.tostring(slide._element) for slide in prs.slides]
+
+
+def get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the shared rendering process pool, resizing it if needed.
+    """
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            else:
+                atexit.register(shutdown_render_pool)
+            logger.info(f"Starting render pool with {workers} processes")
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_render_pool():
+    """
+    Stop the rendering processes, if they were started.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def add_rendered_slide(prs, slide_xml: bytes):
+    """
+    Append a slide rendered by render_slide_chunk to a presentation.
+
+    The slide part is loaded straight from the rendered XML and related to the
+    content layout, the same way Slides.add_slide does, without cloning the
+    layout placeholders again: the rendered XML already has the final shapes.
+    """
+    presentation_part = prs.part
+    slide_part = SlidePart.load(presentation_part._next_slide_partname, CT.PML_SLIDE,
+                                presentation_part.package, slide_xml)
+    slide_part.relate_to(prs.slide_layouts[1].part, RT.SLIDE_LAYOUT)
+    rId = presentation_part.relate_to(slide_part, RT.SLIDE)
+    prs.slides._sldIdLst.add_sldId(rId)
+    return slide_part.slide
+
+
+def create_presentation_parallel(json_data, workers: int = RENDER_WORKERS, deck_layout: Optional[DeckLayout] = None):
+    """
+    Create a PowerPoint presentation, rendering the content slides in worker processes.
+
+    The slides are split into one contiguous chunk per worker. Workers render
+    their chunk with create_content_slide and send back the slide XML, and the
+    parent assembles the package in slide order. The slide XML is byte-identical
+    to create_presentation's serial output.
+
+    Args:
+        json_data (dict or model.Presentation): JSON data containing presentation content and structure
+        workers (int): Number of worker processes
+        deck_layout (Optional[DeckLayout]): Precomputed layout, sent to the workers with
+            their slides instead of being fitted again there
+
+    Returns:
+        Presentation: A PowerPoint presentation object
+    """
+    deck = as_presentation(json_data)
+    slides = deck.slides
+    chunk_size = -(-len(slides) // workers) or 1
+    chunks = [slides[start:start + chunk_size] for start in range(0, len(slides), chunk_size)]
+
+    with span("create_presentation", slides=len(slides) + 1, workers=workers):
+        pool = get_render_pool(workers)
+        starts = range(0, len(slides), chunk_size)
+        if deck_layout is not None:
+            layouts = [deck_layout.slides[start:start + chunk_size] for start in starts]
+        else:
+            layouts = [None] * len(chunks)
+        rendered = pool.map(render_slide_chunk, chunks, [start + 1 for start in starts], layouts)
+
+        prs, THEME_COLORS = new_presentation()
+        create_title_slide(prs, deck, THEME_COLORS, deck_layout.title if deck_layout is not None else None)
+        for chunk in rendered:
+            for slide_xml in chunk:
+                add_rendered_slide(prs, slide_xml)
+
+    return prs
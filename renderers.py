@@ -0,0 +1,313 @@
+import html
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from layout import (BULLET_SPACING, BULLET_WIDTH, CONTENT_TOP, LINE_SPACING, PARAGRAPH_WIDTH, SLIDE_TITLE_FONT_SIZE,
+                    SLIDE_TITLE_WIDTH, TITLE_WIDTH, ContentSlideLayout, DeckLayout, TitleSlideLayout,
+                    layout_presentation)
+from metrics import METRICS_BOLD_FONT, METRICS_FONT, font_path
+from model import THEME_COLORS, Presentation, as_presentation, bullet_color
+from tracing import span
+from utility import create_presentation
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Geometry of the slides drawn by utility.py, in inches: (left, top, width, height)
+SLIDE_WIDTH = 13.333
+SLIDE_HEIGHT = 7.5
+TITLE_BOX = (1, 2, TITLE_WIDTH, 1.5)
+SUBTITLE_BOX = (1, 3.5, TITLE_WIDTH, 2)
+SLIDE_TITLE_BOX = (0.5, 0.5, SLIDE_TITLE_WIDTH, 1)
+PARAGRAPH_LEFT = 0.5
+SLIDE_NUMBER_BOX = (12, 6.8, 0.5, 0.3)
+SLIDE_NUMBER_FONT_SIZE = 14
+# Left and top inset of a text box
+TEXT_INSET = (0.1, 0.05)
+
+# Static shapes of the slide layouts (see utility.add_layout_chrome), as box and theme color
+TITLE_CHROME = [((0, 0, SLIDE_WIDTH, SLIDE_HEIGHT), 'primary'), ((1, 3, 2, 0.1), 'accent')]
+CONTENT_CHROME = [((0, 0, SLIDE_WIDTH, SLIDE_HEIGHT), 'background'), ((0, 0, 0.25, SLIDE_HEIGHT), 'primary'),
+                  ((0.5, 1.4, 2, 0.06), 'accent')]
+TITLE_TEXT_COLOR = (255, 255, 255)
+
+FONT_NAME = "SlideSans"
+BOLD_FONT_NAME = "SlideSans-Bold"
+_font_lock = threading.Lock()
+
+
+class Renderer(ABC):
+    """
+    Writes a deck in one output format.
+
+    Every renderer draws from the same DeckLayout, so the font sizes are
+    fitted once for all formats. Renderers that place text line by line set
+    ``needs_lines`` to have the layout wrap the texts as well.
+    """
+    name = ""
+    extension = ""
+    needs_lines = False
+
+    @abstractmethod
+    def render(self, deck: Presentation, deck_layout: DeckLayout, path: Path) -> None:
+        """
+        Write ``deck`` to ``path``.
+
+        Args:
+            deck (Presentation): The presentation model
+            deck_layout (DeckLayout): Its layout, from layout.layout_presentation
+            path (Path): Output file
+        """
+
+
+class PptxRenderer(Renderer):
+    """PowerPoint output, see utility.create_presentation."""
+    name = "pptx"
+    extension = ".pptx"
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = workers
+
+    def render(self, deck: Presentation, deck_layout: DeckLayout, path: Path) -> None:
+        create_presentation(deck, self.workers, deck_layout).save(str(path))
+
+
+def _register_fonts() -> None:
+    """Register the measuring fonts with reportlab, so the PDF wraps exactly as measured."""
+    with _font_lock:
+        if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(FONT_NAME, str(font_path(METRICS_FONT))))
+            pdfmetrics.registerFont(TTFont(BOLD_FONT_NAME, str(font_path(METRICS_BOLD_FONT))))
+
+
+class PdfRenderer(Renderer):
+    """
+    PDF output drawn with reportlab, one page per slide.
+
+    Text is set in the fonts the layout measures with (metrics.METRICS_FONT),
+    using the wrapped lines of the layout.
+    """
+    name = "pdf"
+    extension = ".pdf"
+    needs_lines = True
+
+    def render(self, deck: Presentation, deck_layout: DeckLayout, path: Path) -> None:
+        _register_fonts()
+        pdf = canvas.Canvas(str(path), pagesize=(SLIDE_WIDTH * inch, SLIDE_HEIGHT * inch))
+        pdf.setTitle(deck_layout.title.title)
+
+        self._title_slide(pdf, deck_layout.title)
+        pdf.showPage()
+        for slide_layout in deck_layout.slides:
+            self._content_slide(pdf, slide_layout)
+            pdf.showPage()
+        pdf.save()
+
+    @staticmethod
+    def _chrome(pdf, chrome) -> None:
+        for (left, top, width, height), color in chrome:
+            pdf.setFillColorRGB(*(channel / 255 for channel in THEME_COLORS[color]))
+            pdf.rect(left * inch, (SLIDE_HEIGHT - top - height) * inch, width * inch, height * inch,
+                     stroke=0, fill=1)
+
+    @staticmethod
+    def _lines(pdf, lines: List[str], left: float, top: float, font_size: int, color, bold: bool = False) -> float:
+        """Draw lines of text from the top of a box in inches and return the top of the next line."""
+        pdf.setFont(BOLD_FONT_NAME if bold else FONT_NAME, font_size)
+        pdf.setFillColorRGB(*(channel / 255 for channel in color))
+        leading = font_size * LINE_SPACING / 72
+        x = (left + TEXT_INSET[0]) * inch
+        for line in lines:
+            pdf.drawString(x, (SLIDE_HEIGHT - top - TEXT_INSET[1]) * inch - font_size, line)
+            top += leading
+        return top
+
+    def _title_slide(self, pdf, text_layout: TitleSlideLayout) -> None:
+        self._chrome(pdf, TITLE_CHROME)
+        self._lines(pdf, text_layout.title_lines, TITLE_BOX[0], TITLE_BOX[1], text_layout.title_font_size,
+                    TITLE_TEXT_COLOR, bold=True)
+        self._lines(pdf, text_layout.subtitle_lines, SUBTITLE_BOX[0], SUBTITLE_BOX[1],
+                    text_layout.subtitle_font_size, THEME_COLORS['secondary'])
+
+    def _content_slide(self, pdf, text_layout: ContentSlideLayout) -> None:
+        self._chrome(pdf, CONTENT_CHROME)
+        self._lines(pdf, text_layout.title_lines, SLIDE_TITLE_BOX[0], SLIDE_TITLE_BOX[1], SLIDE_TITLE_FONT_SIZE,
+                    THEME_COLORS['primary'], bold=True)
+
+        font_size = text_layout.font_size
+        if text_layout.paragraph:
+            self._lines(pdf, text_layout.paragraph_lines, PARAGRAPH_LEFT, CONTENT_TOP, font_size,
+                        THEME_COLORS['text'])
+
+        top = text_layout.bullets_top
+        for point, lines in zip(text_layout.bullet_points, text_layout.bullet_lines):
+            top = self._lines(pdf, lines, PARAGRAPH_LEFT, top, font_size, bullet_color(point)) + BULLET_SPACING
+
+        left, top, width, height = SLIDE_NUMBER_BOX
+        pdf.setFont(FONT_NAME, SLIDE_NUMBER_FONT_SIZE)
+        pdf.setFillColorRGB(*(channel / 255 for channel in THEME_COLORS['primary']))
+        pdf.drawRightString((left + width - TEXT_INSET[0]) * inch,
+                            (SLIDE_HEIGHT - top - TEXT_INSET[1]) * inch - SLIDE_NUMBER_FONT_SIZE,
+                            str(text_layout.number))
+
+
+def _css_color(color) -> str:
+    return "#%02x%02x%02x" % tuple(color)
+
+
+def _css_box(box: Tuple[float, float, float, float], height: bool = True) -> str:
+    left, top, width, box_height = box
+    style = f"left:{left}in;top:{top}in;width:{width}in;"
+    return style + (f"height:{box_height}in;" if height else "")
+
+
+class HtmlRenderer(Renderer):
+    """
+    A static HTML page with one fixed-size section per slide.
+
+    The browser wraps the text, at the font sizes of the layout. The page
+    prints one slide per page.
+    """
+    name = "html"
+    extension = ".html"
+
+    STYLE = f"""
+@page {{ size: {SLIDE_WIDTH}in {SLIDE_HEIGHT}in; margin: 0; }}
+body {{ margin: 0; background: #666; font-family: Calibri, Carlito, "Bitstream Vera Sans", sans-serif; }}
+section {{ position: relative; width: {SLIDE_WIDTH}in; height: {SLIDE_HEIGHT}in; margin: 0 auto 0.25in;
+          overflow: hidden; break-after: page; }}
+section > div {{ position: absolute; box-sizing: border-box; padding: {TEXT_INSET[1]}in {TEXT_INSET[0]}in;
+                 line-height: {LINE_SPACING}; overflow-wrap: anywhere; }}
+section > div.shape {{ padding: 0; }}
+p {{ margin: 0; }}
+p.bullet {{ margin-bottom: {BULLET_SPACING}in; }}
+"""
+
+    def render(self, deck: Presentation, deck_layout: DeckLayout, path: Path) -> None:
+        parts = ['<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n',
+                 f'<title>{html.escape(deck_layout.title.title)}</title>\n<style>{self.STYLE}</style>\n</head>\n<body>\n']
+        parts.append(self._title_slide(deck_layout.title))
+        parts.extend(self._content_slide(slide_layout) for slide_layout in deck_layout.slides)
+        parts.append('</body>\n</html>\n')
+        Path(path).write_text("".join(parts), encoding='utf-8')
+
+    @staticmethod
+    def _chrome(chrome) -> str:
+        return "".join(f'<div class="shape" style="{_css_box(box)}background:{_css_color(THEME_COLORS[color])}"></div>\n'
+                       for box, color in chrome)
+
+    @staticmethod
+    def _text(box, text: str, font_size: int, color, bold: bool = False, extra: str = "") -> str:
+        weight = "font-weight:bold;" if bold else ""
+        return (f'<div style="{_css_box(box, height=False)}font-size:{font_size}pt;{weight}'
+                f'color:{_css_color(color)};{extra}">{html.escape(text)}</div>\n')
+
+    def _title_slide(self, text_layout: TitleSlideLayout) -> str:
+        return ('<section class="title">\n' + self._chrome(TITLE_CHROME)
+                + self._text(TITLE_BOX, text_layout.title, text_layout.title_font_size, TITLE_TEXT_COLOR, bold=True)
+                + self._text(SUBTITLE_BOX, text_layout.subtitle, text_layout.subtitle_font_size,
+                             THEME_COLORS['secondary'])
+                + '</section>\n')
+
+    def _content_slide(self, text_layout: ContentSlideLayout) -> str:
+        parts = ['<section>\n', self._chrome(CONTENT_CHROME),
+                 self._text(SLIDE_TITLE_BOX, text_layout.title, SLIDE_TITLE_FONT_SIZE, THEME_COLORS['primary'],
+                            bold=True)]
+
+        font_size = text_layout.font_size
+        if text_layout.paragraph:
+            parts.append(self._text((PARAGRAPH_LEFT, CONTENT_TOP, PARAGRAPH_WIDTH, 0), text_layout.paragraph,
+                                    font_size, THEME_COLORS['text']))
+        if text_layout.bullet_points:
+            bullets = "".join(
+                f'<p class="bullet" style="color:{_css_color(bullet_color(point))}">• {html.escape(point)}</p>'
+                for point in text_layout.bullet_points)
+            parts.append(f'<div style="{_css_box((PARAGRAPH_LEFT, text_layout.bullets_top, BULLET_WIDTH, 0), False)}'
+                         f'font-size:{font_size}pt">{bullets}</div>\n')
+
+        parts.append(self._text(SLIDE_NUMBER_BOX, str(text_layout.number), SLIDE_NUMBER_FONT_SIZE,
+                                THEME_COLORS['primary'], extra="text-align:right;"))
+        parts.append('</section>\n')
+        return "".join(parts)
+
+
+class MarkdownRenderer(Renderer):
+    """A Markdown outline of the deck, one section per slide."""
+    name = "md"
+    extension = ".md"
+
+    def render(self, deck: Presentation, deck_layout: DeckLayout, path: Path) -> None:
+        parts = [f"# {deck_layout.title.title}\n"]
+        if deck_layout.title.subtitle:
+            parts.append(f"\n_{deck_layout.title.subtitle}_\n")
+        for slide_layout in deck_layout.slides:
+            parts.append(f"\n---\n\n## {slide_layout.title}\n")
+            if slide_layout.paragraph:
+                parts.append(f"\n{slide_layout.paragraph}\n")
+            if slide_layout.bullet_points:
+                parts.append("\n" + "".join(f"- {point}\n" for point in slide_layout.bullet_points))
+        Path(path).write_text("".join(parts), encoding='utf-8')
+
+
+RENDERERS = {renderer.name: renderer for renderer in (PptxRenderer, PdfRenderer, HtmlRenderer, MarkdownRenderer)}
+
+
+def get_renderer(name: str, workers: Optional[int] = None) -> Renderer:
+    """
+    Return the renderer of an output format.
+
+    Args:
+        name (str): One of RENDERERS
+        workers (int, optional): Rendering processes of the PPTX renderer
+
+    Raises:
+        ValueError: For an unknown format.
+    """
+    try:
+        renderer = RENDERERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output format {name!r}, expected one of {', '.join(RENDERERS)}") from None
+    return renderer(workers) if renderer is PptxRenderer else renderer()
+
+
+def render_presentation(json_data, formats: Sequence[str], output_stem, workers: Optional[int] = None) -> Dict[str, Path]:
+    """
+    Write a deck in several formats from one layout pass.
+
+    Args:
+        json_data (dict or model.Presentation): The slide JSON or the presentation model
+        formats (Sequence[str]): Output formats, see RENDERERS
+        output_stem: Output path without extension, e.g. ``output/result``
+        workers (int, optional): Rendering processes of the PPTX renderer
+
+    Returns:
+        Dict[str, Path]: The file written for every format.
+    """
+    renderers = [get_renderer(name, workers) for name in formats]
+    deck = as_presentation(json_data)
+    output_stem = Path(output_stem)
+
+    written = {}
+    with span("render_presentation", formats=",".join(formats), slides=len(deck.slides) + 1):
+        deck_layout = layout_presentation(deck, wrap=any(renderer.needs_lines for renderer in renderers))
+        for renderer in renderers:
+            path = output_stem.with_suffix(renderer.extension)
+            with span("render", format=renderer.name):
+                renderer.render(deck, deck_layout, path)
+            written[renderer.name] = path
+            logger.info(f"Wrote {path}")
+    return written
@@ -1,8 +1,19 @@
 import os
 import logging
+import argparse
 from pathlib import Path
 from convo import Convo2Slide
-from utility import create_presentation
+from batch import BATCH_CONCURRENCY, run_batch
+from incremental import incremental_pipeline
+from model import Presentation
+from schema import SlideValidationError
+from scrape import log_readiness_stats
+from slide_stream import SlideStreamParser
+from tokens import export_token_metrics
+from tracing import enable_tracing, export_trace
+from pptx_writer import write_presentation_stream
+from renderers import RENDERERS, render_presentation
+from utility import set_completion_cache
 
 from dotenv import load_dotenv
 
@@ -14,7 +25,64 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__) 
 
 
-def main(): 
+def output_formats(value):
+    formats = [name.strip().lower() for name in value.split(',') if name.strip()]
+    unknown = [name for name in formats if name not in RENDERERS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"expected formats among {', '.join(RENDERERS)}, got {value!r}")
+    return list(dict.fromkeys(formats))
+
+
+def collect(items, into):
+    """Yield the items of an iterable, appending each to ``into``."""
+    for item in items:
+        into.append(item)
+        yield item
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a shared chat conversation into a power point presentation.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Re-scrape the conversation even if a cached copy exists.")
+    parser.add_argument('--no-completion-cache', action='store_true',
+                        help="Ask the LLM again instead of reusing cached completions, and do not cache the new ones. "
+                             "Same as COMPLETION_CACHE=off.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the slide completion and write each slide to the output file as soon as it is generated.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only regenerate the note and slides affected by messages appended since the last run. "
+                             "The conversation is always scraped again in this mode.")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Convert every URL listed in FILE (one per line, '-' for stdin) instead of the 'url' "
+                             "environment variable.")
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY,
+                        help="Number of URLs waiting on the LLM at the same time in batch mode. Scrape and render "
+                             "workers are set with BATCH_SCRAPE_CONCURRENCY and BATCH_RENDER_CONCURRENCY.")
+    parser.add_argument('--summary', metavar='PATH',
+                        help="Where to write the batch JSONL summary ('-' for stdout). "
+                             "Defaults to output/summary.jsonl.")
+    parser.add_argument('--token-metrics', metavar='PATH',
+                        help="Write the prompt token counts of this run to a JSON file.")
+    parser.add_argument('--render-workers', type=int, default=None,
+                        help="Processes used to render large decks. Defaults to RENDER_WORKERS (the CPU count); "
+                             "1 renders in this process.")
+    parser.add_argument('--format', type=output_formats, default=['pptx'],
+                        help="Comma-separated output formats, written to output/result.<ext>: "
+                             f"{', '.join(RENDERERS)}. Defaults to pptx.")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="Record spans and counters for this run and write them to PATH.")
+    parser.add_argument('--trace-format', choices=['json', 'otlp'], default='json',
+                        help="Format of the --trace file: a plain span list or OpenTelemetry OTLP/JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None): 
+
+    args = parse_args(argv)
+    if args.trace:
+        enable_tracing()
+    if args.no_completion_cache:
+        set_completion_cache(None)
 
     # Get the directory of the current script (run.py)
     script_dir = Path(__file__).parent
@@ -23,16 +91,49 @@ def main():
     output_dir = script_dir / 'output'
     output_dir.mkdir(exist_ok=True)  # Create 'output' directory if it doesn't exist
 
+    if args.batch:
+        records = run_batch(args.batch, output_dir, args.summary, args.concurrency, args.refresh)
+        if args.token_metrics:
+            export_token_metrics(args.token_metrics)
+        if args.trace:
+            export_trace(args.trace, args.trace_format)
+        return records
+
     url = os.environ.get('url', 'default_value')
     if url == 'default_value' or url == '':
         logger.error(f"Can't generate power point from the given url.)")
         return f"Can't generate power point from the given url."
     
     
-    convo2slide = Convo2Slide(url)
+    convo2slide = Convo2Slide(url, refresh=args.refresh)
   
     try: 
-        slides_data = convo2slide.pipeline()
+        if args.incremental:
+            slides_data, presentation = incremental_pipeline(convo2slide)
+        elif args.stream:
+            parser = SlideStreamParser()
+            presentation = None
+            streamed = []
+            slides = collect(convo2slide.stream_slides(parser), streamed)
+            if 'pptx' in args.format:
+                # Each slide goes to the file as soon as it is generated and rendered
+                write_presentation_stream(output_dir / 'result.pptx', parser.presentation, slides)
+            else:
+                for _ in slides:
+                    pass
+            # The validated JSON, not the streamed slides, so every format sees the repaired deck
+            slides_data = convo2slide.slides_data
+            # The repair may have completed a truncated last slide the stream never returned
+            streamed_deck = Presentation.from_json({"presentation": {**parser.presentation, "slides": streamed}})
+            stream_stale = streamed_deck != Presentation.from_json(slides_data)
+        else:
+            slides_data = convo2slide.pipeline()
+    except SlideValidationError as e:
+        output_file = str(output_dir / 'result.txt')
+        with open(output_file, 'w') as f:
+            f.write("Can't generate slides from the given url. The generated slide JSON is invalid:\n")
+            f.write("\n".join(e.errors))
+        raise Exception("Can't generate slides from the given url.") from e
     except:
         output_file = str(output_dir / 'result.txt')
         with open(output_file, 'w') as f:
@@ -43,8 +144,22 @@ def main():
     output_file = str(output_dir / 'result.pptx')
 
    
-    presentation = create_presentation(slides_data)
-    presentation.save(output_file)
+    formats = args.format
+    if args.stream and stream_stale and 'pptx' in formats:
+        logger.info("The repaired slide JSON differs from the streamed slides, writing the PowerPoint file again.")
+    elif args.stream or args.incremental:
+        # The PowerPoint deck is already built
+        if presentation is not None and 'pptx' in formats:
+            presentation.save(output_file)
+        formats = [name for name in formats if name != 'pptx']
+    if formats:
+        render_presentation(slides_data, formats, output_dir / 'result', workers=args.render_workers)
+
+    log_readiness_stats()
+    if args.token_metrics:
+        export_token_metrics(args.token_metrics)
+    if args.trace:
+        export_trace(args.trace, args.trace_format)
 
     logger.info("Successfully generated the power point presentation.)")
 
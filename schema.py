@@ -0,0 +1,405 @@
+import re
+import json
+import logging
+from typing import Any, Callable, List, Optional, Tuple
+
+from utility import extract_json
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Shape of the slide JSON requested by prompt.slide_user_prompt. A dict is an
+# object with required keys, a one-element list an array of that item, a type a leaf.
+PRESENTATION_SCHEMA = {
+    "presentation": {
+        "title": str,
+        "subtitle": str,
+        "slides": [{
+            "title": str,
+            "paragraph": str,
+            "bullet_points": [str],
+        }],
+    },
+}
+
+# Keys the model sometimes uses instead of the schema's, after case normalization
+KEY_ALIASES = {
+    "bullets": "bullet_points",
+    "bulletpoints": "bullet_points",
+    "points": "bullet_points",
+    "content": "paragraph",
+    "description": "paragraph",
+    # "SubTitle" becomes "sub_title"
+    "subtitle": "subtitle",
+}
+
+# Values filled in for missing keys that the slides can do without
+SLIDE_DEFAULTS = {"paragraph": "", "bullet_points": []}
+
+Validator = Callable[[Any, str, List[str]], None]
+
+
+class SlideValidationError(ValueError):
+    """
+    Raised when the slide JSON is invalid and could not be repaired.
+
+    Attributes:
+        errors: One message per schema violation.
+    """
+
+    def __init__(self, errors: List[str]) -> None:
+        self.errors = errors
+        super().__init__("Invalid slide JSON: " + "; ".join(errors))
+
+
+def compile_schema(schema) -> Validator:
+    """
+    Compile a schema description into a validator function.
+
+    The schema is walked once here, so validating a document only calls the
+    nested checks without interpreting the schema again.
+
+    Args:
+        schema: A dict (object with required keys), a one-element list (array of
+            that item) or a type (leaf value).
+
+    Returns:
+        Validator: ``validate(value, path, errors)``, appending a message to
+            ``errors`` for every violation.
+    """
+    if isinstance(schema, dict):
+        fields = [(key, compile_schema(item)) for key, item in schema.items()]
+
+        def validate_object(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{path}: expected an object, got {type(value).__name__}")
+                return
+            for key, validate in fields:
+                if key in value:
+                    validate(value[key], f"{path}.{key}", errors)
+                else:
+                    errors.append(f"{path}.{key}: missing")
+
+        return validate_object
+
+    if isinstance(schema, list):
+        validate_item = compile_schema(schema[0])
+
+        def validate_array(value, path, errors):
+            if not isinstance(value, list):
+                errors.append(f"{path}: expected an array, got {type(value).__name__}")
+                return
+            for index, item in enumerate(value):
+                validate_item(item, f"{path}[{index}]", errors)
+
+        return validate_array
+
+    def validate_leaf(value, path, errors):
+        if not isinstance(value, schema):
+            errors.append(f"{path}: expected {schema.__name__}, got {type(value).__name__}")
+
+    return validate_leaf
+
+
+_validate_presentation = compile_schema(PRESENTATION_SCHEMA)
+_validate_slide = compile_schema(PRESENTATION_SCHEMA["presentation"]["slides"][0])
+
+
+def validate_presentation(data: Any) -> List[str]:
+    """
+    Validate slide JSON against PRESENTATION_SCHEMA.
+
+    Args:
+        data: The parsed slide JSON
+
+    Returns:
+        List[str]: The schema violations; empty if the data is valid.
+    """
+    errors = []
+    _validate_presentation(data, "$", errors)
+    if not errors and not data["presentation"]["slides"]:
+        errors.append("$.presentation.slides: no slides")
+    return errors
+
+
+def validate_slide(slide: Any, index: int) -> List[str]:
+    """
+    Validate one ``slides`` entry against the slide schema.
+
+    Args:
+        slide: The parsed slide
+        index (int): Position of the slide in the deck, used in the messages
+
+    Returns:
+        List[str]: The schema violations; empty if the slide is valid.
+    """
+    errors = []
+    _validate_slide(slide, f"$.presentation.slides[{index}]", errors)
+    return errors
+
+
+def close_json(text: str) -> str:
+    """
+    Drop trailing commas from a JSON object and close it if it was cut off.
+
+    Scans from the first brace to the end of the object. If the text ends
+    inside the object, the open string is closed, an incomplete key or value is
+    dropped and the open arrays and objects are closed.
+
+    Args:
+        text (str): Text starting with the JSON object
+
+    Returns:
+        str: The repaired JSON text. It is not guaranteed to parse.
+    """
+    start = text.find('{')
+    if start == -1:
+        return text
+
+    out = []
+    # Each entry is [bracket, expected token, length of out after the last complete
+    # item, start of the current literal]
+    stack = []
+    in_string = False
+    escape = False
+
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+                _complete_token(stack, len(out))
+            continue
+
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in '{[':
+            out.append(char)
+            stack.append([char, 'key' if char == '{' else 'value', len(out), 0])
+        elif char in '}]':
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            out.append('}' if stack[-1][0] == '{' else ']')
+            stack.pop()
+            if not stack:
+                return ''.join(out)
+            _complete_token(stack, len(out))
+        elif char == ',':
+            if stack[-1][1] == 'literal':
+                stack[-1][2] = len(out)
+            out.append(char)
+            stack[-1][1] = 'key' if stack[-1][0] == '{' else 'value'
+        elif char == ':':
+            out.append(char)
+            stack[-1][1] = 'value'
+        elif char.isspace():
+            out.append(char)
+        else:
+            if stack[-1][1] != 'literal':
+                stack[-1][1] = 'literal'
+                stack[-1][3] = len(out)
+            out.append(char)
+
+    if not stack:
+        return ''.join(out)
+
+    # The text was cut off inside the object
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+        _complete_token(stack, len(out))
+
+    top = stack[-1]
+    if top[1] == 'literal':
+        literal = ''.join(out[top[3]:]).strip()
+        if re.fullmatch(r'true|false|null|-?\d+(\.\d+)?([eE][+-]?\d+)?', literal):
+            top[1] = 'comma'
+            top[2] = len(out)
+    if top[1] != 'comma':
+        del out[top[2]:]
+
+    while stack:
+        _drop_trailing_comma(out)
+        out.append('}' if stack.pop()[0] == '{' else ']')
+    return ''.join(out)
+
+
+def _complete_token(stack: list, length: int):
+    """Advance the innermost container after a string or a nested container ended."""
+    top = stack[-1]
+    if top[0] == '{' and top[1] == 'key':
+        top[1] = 'colon'
+    else:
+        top[1] = 'comma'
+        top[2] = length
+
+
+def _drop_trailing_comma(out: List[str]):
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if end and out[end - 1] == ',':
+        del out[end - 1:]
+
+
+def _normalize_key(key: str) -> str:
+    key = re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', key.strip())
+    key = re.sub(r'[\s\-]+', '_', key).lower()
+    return KEY_ALIASES.get(key.replace('_', ''), key)
+
+
+def _normalize_keys(value):
+    if isinstance(value, dict):
+        return {_normalize_key(key): _normalize_keys(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize_keys(item) for item in value]
+    return value
+
+
+def _as_text(value) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return " ".join(value)
+    return value
+
+
+def _as_bullets(value) -> Any:
+    if isinstance(value, str):
+        lines = [line.strip().lstrip('-*•').strip() for line in value.splitlines()]
+        return [line for line in lines if line]
+    if isinstance(value, list):
+        return [_as_text(item) for item in value]
+    return value
+
+
+def normalize_presentation(data: Any) -> Any:
+    """
+    Fix common deviations from PRESENTATION_SCHEMA in parsed slide JSON.
+
+    Keys are lower-cased (``bulletPoints`` and ``Bullet Points`` become
+    ``bullet_points``), a missing ``presentation`` wrapper is added, numbers are
+    turned into text, a bullet string is split into lines and missing
+    subtitles, paragraphs and bullet points are filled with empty values. Data
+    that cannot be fixed is returned for the validator to report.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    data = _normalize_keys(data)
+    if "presentation" not in data and "slides" in data:
+        data = {"presentation": data}
+
+    presentation = data.get("presentation")
+    if not isinstance(presentation, dict):
+        return data
+
+    presentation.setdefault("subtitle", "")
+    for key in ("title", "subtitle"):
+        presentation[key] = _as_text(presentation.get(key))
+    if presentation["title"] is None:
+        del presentation["title"]
+
+    slides = presentation.get("slides")
+    if isinstance(slides, list):
+        presentation["slides"] = [_normalize_slide_values(slide) for slide in slides]
+
+    return data
+
+
+def _normalize_slide_values(slide: Any) -> Any:
+    if not isinstance(slide, dict):
+        return slide
+    for key, default in SLIDE_DEFAULTS.items():
+        if slide.get(key) is None:
+            slide[key] = type(default)()
+    for key in ("title", "paragraph"):
+        if key in slide:
+            slide[key] = _as_text(slide[key])
+    slide["bullet_points"] = _as_bullets(slide["bullet_points"])
+    return slide
+
+
+def normalize_slide(slide: Any) -> Any:
+    """
+    Fix common deviations from the slide schema in one parsed ``slides`` entry.
+
+    Applies the slide part of normalize_presentation, e.g. to slides parsed
+    from a stream before the whole document is available.
+    """
+    return _normalize_slide_values(_normalize_keys(slide))
+
+
+def _is_slide_document(data: Any) -> bool:
+    """Whether parsed JSON looks like the slide document rather than a fragment of it."""
+    return isinstance(data, dict) and any(
+        isinstance(key, str) and _normalize_key(key) in ("presentation", "slides") for key in data)
+
+
+def repair_json(text: str) -> Optional[dict]:
+    """
+    Parse the slide JSON of a model response, repairing syntax errors.
+
+    The response is parsed with extract_json first, and its object is taken if
+    it has a ``presentation`` or ``slides`` key. Otherwise every ``{"`` in the
+    text, outermost first, is tried as the start of an object that is then
+    passed through close_json, which removes trailing commas and closes
+    truncated strings, arrays and objects.
+
+    Args:
+        text (str): The model response
+
+    Returns:
+        Optional[dict]: The parsed object, or None if nothing could be recovered.
+            An object without slide keys is only returned when no repair
+            yields one, for the validator to report.
+    """
+    extracted = extract_json(text)
+    if _is_slide_document(extracted):
+        return extracted
+
+    fallback = extracted
+    for match in re.finditer(r'\{\s*"', text):
+        try:
+            data = json.loads(close_json(text[match.start():]))
+        except ValueError:
+            continue
+        if _is_slide_document(data):
+            logger.info("Repaired malformed slide JSON.")
+            return data
+        if fallback is None and isinstance(data, dict):
+            fallback = data
+    return fallback
+
+
+def load_presentation(text: str) -> Tuple[Optional[dict], List[str]]:
+    """
+    Parse, repair and validate the slide JSON of a model response.
+
+    Args:
+        text (str): The model response
+
+    Returns:
+        Tuple[Optional[dict], List[str]]: The slide JSON and an empty list if it is
+            valid after repair; otherwise the best effort data (or None) and the
+            schema violations.
+    """
+    data = repair_json(text)
+    if data is None:
+        return None, ["$: no JSON object found in the response"]
+
+    data = normalize_presentation(data)
+    return data, validate_presentation(data)
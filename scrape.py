@@ -1,12 +1,23 @@
 import os
-import sys
+import re
+import json
 import logging
+import threading
 import subprocess
-from time import sleep
+from abc import ABC, abstractmethod
+from time import monotonic
 from pathlib import Path
+from collections import deque
 from typing import Dict, List, Optional
-from playwright.sync_api import sync_playwright
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import requests
+import lxml.html
 from tenacity import retry, stop_after_attempt, wait_exponential
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from browser_pool import BrowserPool, ensure_browser_installed, get_default_pool
+from tracing import current_span, span
 
 
 # Configure logging
@@ -17,71 +28,410 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+MESSAGE_SELECTOR = 'div[data-message-author-role]'
+READY_TIMEOUT_MS = int(os.environ.get("SCRAPE_READY_TIMEOUT_MS", 30000))
+STABLE_FOR_MS = int(os.environ.get("SCRAPE_STABLE_FOR_MS", 1500))
+POLL_INTERVAL_MS = 250
+SCRAPE_BACKEND = os.environ.get("SCRAPE_BACKEND", "auto")
+STATIC_FETCH_TIMEOUT = float(os.environ.get("SCRAPE_STATIC_TIMEOUT", 15))
+
+# Block-level tags that start a new line in the rendered text of a message
+BLOCK_TAGS = (
+    'p', 'div', 'li', 'ul', 'ol', 'pre', 'blockquote', 'table', 'tr',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr',
+)
+
+# Collects every message in a single round trip as a compact [[role, content], ...] array
+EXTRACT_MESSAGES_SCRIPT = """
+(selector) => Array.from(
+    document.querySelectorAll(selector),
+    (el) => [el.getAttribute('data-message-author-role'), el.innerText]
+)
+"""
+
+_ready_timings_lock = threading.Lock()
+_ready_timings = deque(maxlen=10000)
+
+
+def record_time_to_ready(url: str, seconds: float):
+    """
+    Record how long a URL took to become ready for extraction.
+
+    The time is also set as ``time_to_ready_ms`` on the active span, which is
+    the ``scrape`` span of scrape_chat_messages.
+
+    Args:
+        url (str): The scraped URL
+        seconds (float): Time from navigation start until the messages were stable
+    """
+    with _ready_timings_lock:
+        _ready_timings.append((url, seconds))
+    current_span().set_attribute("time_to_ready_ms", round(seconds * 1000, 1))
+    logger.info(f"{url} was ready for extraction after {seconds:.2f} s")
+
+
+def get_ready_timings() -> List[tuple]:
+    """
+    Return the recorded (url, seconds) time-to-ready samples, oldest first.
+    """
+    with _ready_timings_lock:
+        return list(_ready_timings)
+
+
+def last_time_to_ready(url: str) -> Optional[float]:
+    """
+    Return the most recent time-to-ready of ``url`` in seconds, or None if it was not rendered.
+    """
+    with _ready_timings_lock:
+        for sample_url, seconds in reversed(_ready_timings):
+            if sample_url == url:
+                return seconds
+    return None
+
+
+def readiness_stats() -> Dict[str, float]:
+    """
+    Summarize the recorded time-to-ready distribution.
+
+    Returns:
+        Dict[str, float]: Sample count plus min, p50, p90, p99 and max in seconds.
+                          Only the count is returned when nothing was recorded.
+    """
+    samples = sorted(seconds for _, seconds in get_ready_timings())
+    if not samples:
+        return {"count": 0}
+
+    def percentile(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
 
-def install_browser_forcefully():
+    return {
+        "count": len(samples),
+        "min": samples[0],
+        "p50": percentile(0.5),
+        "p90": percentile(0.9),
+        "p99": percentile(0.99),
+        "max": samples[-1],
+    }
+
+
+def log_readiness_stats():
     """
-    Force a clean installation of Playwright browser with all dependencies.
-    Raises subprocess.CalledProcessError if installation fails.
+    Log the time-to-ready distribution of this process, if any page was rendered.
     """
-    logger.info("Starting forced browser installation")
+    stats = readiness_stats()
+    if stats["count"]:
+        logger.info(f"Time to ready over {stats['count']} pages: min {stats['min']:.2f} s, p50 {stats['p50']:.2f} s, "
+                    f"p90 {stats['p90']:.2f} s, p99 {stats['p99']:.2f} s, max {stats['max']:.2f} s")
+
+
+def wait_for_messages(page, timeout_ms: int = READY_TIMEOUT_MS, stable_ms: int = STABLE_FOR_MS,
+                      poll_ms: int = POLL_INTERVAL_MS) -> int:
+    """
+    Wait until the chat messages on the page are rendered and no longer changing.
+
+    Readiness is reached once the message selector is attached, the network is idle
+    and the message count has been stable for ``stable_ms``. Every step shares the
+    ``timeout_ms`` upper bound, so a slow page returns whatever it has by then.
+
+    Args:
+        page: Playwright page that has already navigated to the conversation
+        timeout_ms (int): Upper bound for the whole wait in milliseconds
+        stable_ms (int): How long the message count must stay unchanged
+        poll_ms (int): Interval between message count checks
+
+    Returns:
+        int: Number of messages found on the page when the wait ended.
+    """
+    deadline = monotonic() + timeout_ms / 1000
+
+    def remaining_ms():
+        # Playwright treats a timeout of 0 as "wait forever"
+        return max(1, (deadline - monotonic()) * 1000)
+
     try:
-        # Install browser and dependencies
-        subprocess.run([sys.executable, "-m", "playwright", "install","--with-deps", "chromium"],
-                      check=True, capture_output=True)
-        
-        logger.info("Browser installation completed successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Browser installation failed: {e.stdout.decode() if e.stdout else ''}")
-        raise
+        page.wait_for_selector(MESSAGE_SELECTOR, state='attached', timeout=remaining_ms())
+    except PlaywrightTimeoutError:
+        logger.warning(f"No chat messages appeared within {timeout_ms} ms")
+        return 0
+
+    try:
+        page.wait_for_load_state('networkidle', timeout=remaining_ms())
+    except PlaywrightTimeoutError:
+        logger.debug("Network did not become idle, continuing with the stability check")
+
+    messages = page.locator(MESSAGE_SELECTOR)
+    count = messages.count()
+    stable_since = monotonic()
+    while (monotonic() - stable_since) * 1000 < stable_ms and monotonic() < deadline:
+        page.wait_for_timeout(min(poll_ms, remaining_ms()))
+        current = messages.count()
+        if current != count:
+            count = current
+            stable_since = monotonic()
+
+    return count
+
+
+def extract_messages(page) -> List[Dict[str, str]]:
+    """
+    Extract every chat message from the page in one ``page.evaluate`` call.
+
+    Args:
+        page: Playwright page with the conversation loaded
+
+    Returns:
+        List[Dict[str, str]]: Chat messages with 'role' and 'content' keys.
+    """
+    rows = page.evaluate(EXTRACT_MESSAGES_SCRIPT, MESSAGE_SELECTOR)
+    return [{'role': role, 'content': content} for role, content in rows]
+
+
+def _element_text(element) -> str:
+    """Approximate the browser's innerText for a parsed lxml element."""
+    for br in element.iter('br'):
+        br.tail = "\n" + (br.tail or "")
+    for block in element.iter(*BLOCK_TAGS):
+        block.tail = "\n" + (block.tail or "")
+    text = "".join(element.itertext())
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def _find_json_messages(data) -> List[dict]:
+    """Collect message objects ({"author": {"role"}, "content": {"parts"}}) from embedded JSON."""
+    found = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            author = node.get('author')
+            content = node.get('content')
+            if (isinstance(author, dict) and isinstance(content, dict)
+                    and isinstance(content.get('parts'), list)):
+                found.append(node)
+            else:
+                stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return found
+
+
+def parse_static_messages(html: str) -> List[Dict[str, str]]:
+    """
+    Parse chat messages out of server-rendered HTML without a browser.
+
+    Messages rendered as ``div[data-message-author-role]`` are used when present,
+    otherwise inline JSON script blocks are searched for message objects.
+
+    Args:
+        html (str): The HTML of a shared conversation page
+
+    Returns:
+        List[Dict[str, str]]: Chat messages with 'role' and 'content' keys.
+                             Returns empty list if no messages are found.
+    """
+    if not html or not html.strip():
+        return []
+
+    tree = lxml.html.fromstring(html)
+
+    chat_data = []
+    for element in tree.xpath('//div[@data-message-author-role]'):
+        chat_data.append({'role': element.get('data-message-author-role'), 'content': _element_text(element)})
+    if chat_data:
+        return chat_data
+
+    messages = []
+    for script in tree.xpath('//script[not(@src)]'):
+        body = (script.text or '').strip()
+        if not body.startswith(('{', '[')):
+            continue
+        try:
+            data = json.loads(body)
+        except ValueError:
+            continue
+        messages.extend(_find_json_messages(data))
+
+    if all(isinstance(message.get('create_time'), (int, float)) for message in messages):
+        messages.sort(key=lambda message: message['create_time'])
+
+    seen = set()
+    for message in messages:
+        if message.get('id') is not None:
+            if message['id'] in seen:
+                continue
+            seen.add(message['id'])
+
+        role = message['author'].get('role')
+        content = "\n".join(part for part in message['content']['parts'] if isinstance(part, str)).strip()
+        if role in ('user', 'assistant') and content:
+            chat_data.append({'role': role, 'content': content})
+
+    return chat_data
+
+
+class ScraperBackend(ABC):
+    """
+    Interface for the ways of turning a share URL into chat messages.
+
+    Subclasses implement ``fetch``, which returns the messages as a list of
+    dictionaries with 'role' and 'content' keys and an empty list when the
+    page has no messages.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def fetch(self, url: str) -> List[Dict[str, str]]:
+        """
+        Return the chat messages of ``url``, or an empty list if the page has none.
+        """
+
+
+class StaticHTMLBackend(ScraperBackend):
+    """
+    Fetch the page HTML (or read a local file) and parse it with lxml.
+    """
+
+    name = "static"
 
+    def __init__(self, timeout: float = STATIC_FETCH_TIMEOUT, session: Optional[requests.Session] = None) -> None:
+        self.timeout = timeout
+        self.session = session or requests.Session()
 
+    def read(self, url: str) -> str:
+        """
+        Return the HTML for ``url``. ``file://`` URLs and local paths are read from disk.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme == 'file':
+            return Path(url2pathname(parsed.path)).read_text(encoding='utf-8')
+        if parsed.scheme not in ('http', 'https'):
+            return Path(url).read_text(encoding='utf-8')
 
-def scrape_chat_messages(url:str) -> List[Dict[str, str]]:
+        response = self.session.get(url, timeout=self.timeout, headers={'User-Agent': 'Mozilla/5.0'})
+        response.raise_for_status()
+        return response.text
+
+    def fetch(self, url: str) -> List[Dict[str, str]]:
+        return parse_static_messages(self.read(url))
+
+
+class PlaywrightBackend(ScraperBackend):
+    """
+    Render the page in a pooled headless Chromium and extract the messages.
     """
-    Scrape chat messages from a given URL using Playwright.
+
+    name = "playwright"
+
+    def __init__(self, pool: Optional[BrowserPool] = None) -> None:
+        self.pool = pool
+
+    def fetch(self, url: str) -> List[Dict[str, str]]:
+        try:
+            ensure_browser_installed()
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Error during installation: {e}")
+            raise RuntimeError("Could not install the Playwright browser") from e
+
+        pool = self.pool if self.pool is not None else get_default_pool()
+
+        logging.info(f"Start scraping chat messages")
+        with pool.lease() as page:
+            try:
+                started = monotonic()
+                page.goto(url, wait_until='domcontentloaded')
+                wait_for_messages(page)
+                record_time_to_ready(url, monotonic() - started)
+
+            except:
+                logging.error(f"Can't scrape chat messages from the given url:{url}")
+                return []
+
+            else:
+                return extract_messages(page)
+
+
+class FallbackBackend(ScraperBackend):
+    """
+    Try each backend in order and return the first non-empty result.
+    """
+
+    name = "auto"
+
+    def __init__(self, *backends: ScraperBackend) -> None:
+        self.backends = backends
+
+    def fetch(self, url: str) -> List[Dict[str, str]]:
+        for backend in self.backends:
+            try:
+                chat_data = backend.fetch(url)
+            except Exception as e:
+                logger.warning(f"The {backend.name} backend failed for {url}.\nException: {e}")
+                continue
+
+            if chat_data:
+                return chat_data
+            logger.info(f"The {backend.name} backend found no chat messages, trying the next backend")
+
+        return []
+
+
+def get_backend(name: str = SCRAPE_BACKEND, pool: Optional[BrowserPool] = None) -> ScraperBackend:
+    """
+    Build a scraper backend by name.
+
+    Args:
+        name (str): One of "static", "playwright" or "auto" (static first, then Playwright)
+        pool (Optional[BrowserPool]): Browser pool used by the Playwright backend
+
+    Returns:
+        ScraperBackend: The requested backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name == "static":
+        return StaticHTMLBackend()
+    if name == "playwright":
+        return PlaywrightBackend(pool)
+    if name == "auto":
+        return FallbackBackend(StaticHTMLBackend(), PlaywrightBackend(pool))
+    raise ValueError(f"Unknown scraper backend '{name}'. Expected static, playwright or auto.")
+
+
+def scrape_chat_messages(url:str, pool: Optional[BrowserPool] = None,
+                         backend: Optional[ScraperBackend] = None) -> List[Dict[str, str]]:
+    """
+    Scrape chat messages from a given URL.
+
+    By default the server-rendered HTML is parsed first and Playwright is only
+    used when no messages are found there (see ``SCRAPE_BACKEND``).
     
     Args:
         url (str): The URL to scrape chat messages from
+        pool (Optional[BrowserPool]): Browser pool to lease a page from. Defaults to the
+                                      long-lived pool of the current thread.
+        backend (Optional[ScraperBackend]): Backend used to fetch the messages. Defaults to
+                                            the one named by ``SCRAPE_BACKEND``.
         
     Returns:
         List[Dict[str, str]]: A list of dictionaries containing chat messages with 'role' and 'content' keys.
                              Returns empty list if scraping fails.
     """
     logger.info(f"Attempting to scrape chat messages from {url}")
-   
-      
-    try:
-        install_browser_forcefully()
-        print(f"Playwright and browser installation check completed successfully:")
-    except subprocess.CalledProcessError as e:
-        print(f"Error during installation: {e}")
-        sys.exit(1)
 
-    logging.info(f"Start scraping chat messages")
-    with sync_playwright() as p:
+    if backend is None:
+        backend = get_backend(pool=pool)
 
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        try:
-            page.goto(url)
-            sleep(15)
+    with span("scrape", url=url, backend=backend.name) as s:
+        chat_data = backend.fetch(url)
+        if s.recording:
+            s.set_attribute("messages", len(chat_data))
+            s.set_attribute("bytes", sum(len(message['content'].encode()) for message in chat_data))
 
-        except:
-            logging.error(f"Can't scrape chat messages from the given url:{url}")
-            return []
-        
-        else:
-            messages = page.query_selector_all('div[data-message-author-role]')
-            chat_data = [] 
-            for message in messages:
-                role = message.get_attribute('data-message-author-role')  # user or assistant
-                content = message.inner_text()  # Extract message text
-                chat_data.append({'role': role, 'content': content})
-            
-            browser.close()
-
-            logger.info("Successfully scraped chat messages")
-            
-            return chat_data
-    
+    if chat_data:
+        logger.info("Successfully scraped chat messages")
+    else:
+        logger.error(f"Can't scrape chat messages from the given url:{url}")
+
+    return chat_data
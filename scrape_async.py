@@ -0,0 +1,181 @@
+import os
+import asyncio
+import logging
+from time import monotonic
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from playwright.async_api import async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from browser_pool import ensure_browser_installed
+from scrape import EXTRACT_MESSAGES_SCRIPT, MESSAGE_SELECTOR, READY_TIMEOUT_MS, STABLE_FOR_MS, POLL_INTERVAL_MS, record_time_to_ready
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CONCURRENCY = int(os.environ.get("SCRAPE_CONCURRENCY", 4))
+DEFAULT_URL_TIMEOUT = float(os.environ.get("SCRAPE_URL_TIMEOUT", 90))
+
+
+class ScrapeBatchResult(NamedTuple):
+    """
+    Outcome of a batch scrape.
+
+    Attributes:
+        results: Chat messages for every URL that was scraped successfully.
+        errors: Error description for every URL that failed or timed out.
+    """
+    results: Dict[str, List[Dict[str, str]]]
+    errors: Dict[str, str]
+
+
+async def async_wait_for_messages(page, timeout_ms: int = READY_TIMEOUT_MS, stable_ms: int = STABLE_FOR_MS,
+                                  poll_ms: int = POLL_INTERVAL_MS) -> int:
+    """
+    Async counterpart of ``scrape.wait_for_messages``.
+
+    Args:
+        page: Playwright async page that has already navigated to the conversation
+        timeout_ms (int): Upper bound for the whole wait in milliseconds
+        stable_ms (int): How long the message count must stay unchanged
+        poll_ms (int): Interval between message count checks
+
+    Returns:
+        int: Number of messages found on the page when the wait ended.
+    """
+    deadline = monotonic() + timeout_ms / 1000
+
+    def remaining_ms():
+        # Playwright treats a timeout of 0 as "wait forever"
+        return max(1, (deadline - monotonic()) * 1000)
+
+    try:
+        await page.wait_for_selector(MESSAGE_SELECTOR, state='attached', timeout=remaining_ms())
+    except PlaywrightTimeoutError:
+        logger.warning(f"No chat messages appeared within {timeout_ms} ms")
+        return 0
+
+    try:
+        await page.wait_for_load_state('networkidle', timeout=remaining_ms())
+    except PlaywrightTimeoutError:
+        logger.debug("Network did not become idle, continuing with the stability check")
+
+    messages = page.locator(MESSAGE_SELECTOR)
+    count = await messages.count()
+    stable_since = monotonic()
+    while (monotonic() - stable_since) * 1000 < stable_ms and monotonic() < deadline:
+        await page.wait_for_timeout(min(poll_ms, remaining_ms()))
+        current = await messages.count()
+        if current != count:
+            count = current
+            stable_since = monotonic()
+
+    return count
+
+
+async def _scrape_page(browser, url: str) -> List[Dict[str, str]]:
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        started = monotonic()
+        await page.goto(url, wait_until='domcontentloaded')
+        await async_wait_for_messages(page)
+        record_time_to_ready(url, monotonic() - started)
+
+        rows = await page.evaluate(EXTRACT_MESSAGES_SCRIPT, MESSAGE_SELECTOR)
+        return [{'role': role, 'content': content} for role, content in rows]
+    finally:
+        await context.close()
+
+
+async def _ensure_browser_installed():
+    await asyncio.get_running_loop().run_in_executor(None, ensure_browser_installed)
+
+
+async def async_scrape_chat_messages(url: str, browser=None) -> List[Dict[str, str]]:
+    """
+    Scrape chat messages from a given URL using Playwright's async API.
+
+    Args:
+        url (str): The URL to scrape chat messages from
+        browser: An already launched async Playwright browser. A browser is launched
+                 and closed for this call when omitted.
+
+    Returns:
+        List[Dict[str, str]]: A list of dictionaries containing chat messages with 'role' and 'content' keys.
+                             Returns empty list if scraping fails.
+    """
+    logger.info(f"Attempting to scrape chat messages from {url}")
+
+    if browser is None:
+        await _ensure_browser_installed()
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                return await async_scrape_chat_messages(url, browser)
+            finally:
+                await browser.close()
+
+    try:
+        chat_data = await _scrape_page(browser, url)
+    except Exception as e:
+        logger.error(f"Can't scrape chat messages from the given url:{url}\nException: {e}")
+        return []
+
+    logger.info("Successfully scraped chat messages")
+    return chat_data
+
+
+async def scrape_many(urls: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY,
+                      timeout: Optional[float] = DEFAULT_URL_TIMEOUT) -> ScrapeBatchResult:
+    """
+    Scrape many share URLs concurrently with a single browser.
+
+    At most ``concurrency`` pages are open at once and each URL is given
+    ``timeout`` seconds. Failures are collected instead of aborting the batch.
+
+    Args:
+        urls (Iterable[str]): Share URLs to scrape. Duplicates are scraped once.
+        concurrency (int): Maximum number of URLs scraped at the same time
+        timeout (Optional[float]): Per-URL timeout in seconds, or None for no limit
+
+    Returns:
+        ScrapeBatchResult: Messages for the successful URLs and errors for the rest.
+    """
+    urls = list(dict.fromkeys(urls))
+    results = {}
+    errors = {}
+    if not urls:
+        return ScrapeBatchResult(results, errors)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape_one(browser, url):
+        async with semaphore:
+            try:
+                chat_data = await asyncio.wait_for(_scrape_page(browser, url), timeout)
+            except asyncio.TimeoutError:
+                errors[url] = f"Timed out after {timeout} seconds"
+            except Exception as e:
+                errors[url] = f"{type(e).__name__}: {e}"
+            else:
+                if chat_data:
+                    results[url] = chat_data
+                else:
+                    errors[url] = "No chat messages found"
+
+    await _ensure_browser_installed()
+    logger.info(f"Scraping {len(urls)} urls with concurrency {concurrency}")
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            await asyncio.gather(*(scrape_one(browser, url) for url in urls))
+        finally:
+            await browser.close()
+
+    logger.info(f"Scraped {len(results)} urls, {len(errors)} failed")
+    return ScrapeBatchResult(results, errors)
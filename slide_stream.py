@@ -0,0 +1,426 @@
+import re
+import json
+import logging
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional
+
+from lxml import etree
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _key_name(key):
+    """Key compared with the document keys: ``Title``, ``sub_title`` and ``Sub Title`` all match."""
+    if not isinstance(key, str):
+        return key
+    return re.sub(r'[\W_]', '', key).lower()
+
+
+class SlideStreamParser():
+    """
+    Incremental parser for streamed slide JSON.
+
+    Text is fed in arbitrary chunks. Every object inside a ``slides`` array is
+    returned by ``feed`` as soon as its closing brace arrives, and the
+    ``title``/``subtitle`` strings of the ``presentation`` object are collected
+    in ``presentation`` as they complete. Prose or code fences around the JSON
+    are ignored, and so are braces in the prose before it: a ``{`` not
+    followed by a quote or ``}`` does not start an object, and a root object
+    that closes without being the slide document (no ``presentation`` and no
+    slides) is dropped and scanning goes on. Keys are matched ignoring
+    case, spaces and underscores, so ``"Presentation"`` and ``"Title"`` work;
+    ``presentation`` always uses the keys ``title`` and ``subtitle``.
+    """
+
+    def __init__(self, array_key: str = 'slides') -> None:
+        self.array_key = _key_name(array_key)
+        self.presentation = {}
+        self.slides: List[dict] = []
+        self.done = False
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        self._root_start = None
+        self._root_end = None
+        self._root_slides = 0
+        # Offset of a ``{`` outside the document, until the next character shows whether it starts one
+        self._root_candidate = None
+        # Each entry is [bracket, key under which the container sits, start offset]
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key = None
+
+    def feed(self, chunk: str) -> List[dict]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk (str): The next piece of the streamed response
+
+        Returns:
+            List[dict]: The slides completed by this chunk, in order.
+        """
+        if not chunk:
+            return []
+
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+        # Text after the document is still kept for ``text``
+        if self.done:
+            return []
+
+        completed = []
+        stack = self._stack
+        for j, char in enumerate(chunk):
+            i = base + j
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string(i)
+                continue
+
+            if not stack:
+                if self._root_candidate is not None:
+                    if char.isspace():
+                        continue
+                    start = self._root_candidate
+                    self._root_candidate = None
+                    if char in '"}':
+                        self._root_start = start
+                        self._root_slides = len(self.slides)
+                        stack.append(['{', None, start])
+                        self._expect_key = True
+                if not stack:
+                    # A JSON object starts with a key or is empty, any other brace is prose
+                    if char == '{':
+                        self._root_candidate = i
+                    continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in '{[':
+                parent = stack[-1]
+                key = self._key if parent[0] == '{' else None
+                stack.append([char, key, i])
+                self._expect_key = char == '{'
+                self._key = None
+            elif char in '}]':
+                bracket, key, start = stack.pop()
+                completed.extend(self._emit(bracket, start, i))
+                if not stack:
+                    if self._is_document(i + 1):
+                        self._root_end = i + 1
+                        self.done = True
+                        break
+                    # Braces in the prose, e.g. "the {deck}": look for the next root
+                    self.presentation = {}
+                    self._expect_key = False
+                    self._key = None
+                    continue
+                self._key = None
+                self._expect_key = False
+            elif char == ',':
+                if stack[-1][0] == '{':
+                    self._expect_key = True
+                self._key = None
+
+        return completed
+
+    def _is_document(self, end: int) -> bool:
+        """Whether the root object that just closed at ``end`` is the slide document."""
+        if len(self.slides) > self._root_slides:
+            return True
+        try:
+            root = json.loads(self._slice(self._root_start, end))
+        except ValueError:
+            return False
+        return isinstance(root, dict) and any(_key_name(key) in ('presentation', self.array_key) for key in root)
+
+    def _slice(self, start: int, end: int) -> str:
+        """Return the received text between the absolute offsets ``start`` and ``end``."""
+        first = bisect_right(self._offsets, start) - 1
+        last = bisect_right(self._offsets, end - 1) - 1
+        text = "".join(self._chunks[first:last + 1])
+        offset = self._offsets[first]
+        return text[start - offset:end - offset]
+
+    def _on_string(self, end: int):
+        if self._stack[-1][0] != '{':
+            return
+        try:
+            value = json.loads(self._slice(self._string_start, end + 1))
+        except ValueError:
+            value = None
+        if self._expect_key:
+            self._key = _key_name(value)
+            self._expect_key = False
+        elif self._in_presentation() and self._key in ('title', 'subtitle'):
+            self.presentation[self._key] = value
+
+    def _in_presentation(self) -> bool:
+        # The root itself when the model left out the ``presentation`` wrapper
+        return len(self._stack) == 1 or (len(self._stack) == 2 and self._stack[-1][1] == 'presentation')
+
+    def _emit(self, bracket: str, start: int, end: int) -> List[dict]:
+        stack = self._stack
+        if bracket != '{' or not stack or stack[-1][0] != '[' or stack[-1][1] != self.array_key:
+            return []
+        try:
+            slide = json.loads(self._slice(start, end + 1))
+        except ValueError as e:
+            logger.warning(f"Skipping malformed slide in stream.\nException: {e}")
+            return []
+        self.slides.append(slide)
+        return [slide]
+
+    @property
+    def text(self) -> str:
+        """The full text received so far."""
+        return "".join(self._chunks)
+
+    def result(self) -> Optional[dict]:
+        """
+        Return the complete parsed document once the root object has closed.
+
+        Returns:
+            Optional[dict]: The parsed JSON, or None if the stream ended early or is invalid.
+        """
+        if not self.done:
+            return None
+        try:
+            return json.loads(self._slice(self._root_start, self._root_end))
+        except ValueError:
+            return None
+
+
+def iter_slides(chunks: Iterable[str], parser: Optional[SlideStreamParser] = None) -> Iterator[dict]:
+    """
+    Yield each slide object from a stream of text chunks as soon as it is complete.
+
+    Args:
+        chunks (Iterable[str]): Streamed text, e.g. from utility.stream_completion
+        parser (Optional[SlideStreamParser]): Parser to use, so callers can read
+            ``parser.presentation`` and ``parser.result()`` while or after iterating
+
+    Yields:
+        dict: One slide dictionary at a time.
+    """
+    if parser is None:
+        parser = SlideStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+
+# Start of the root element of the XML topic format, e.g. ``<PowerPoint>``
+_TOPICS_ROOT = re.compile(r"<PowerPoint\b", re.IGNORECASE)
+_TOPICS_ROOT_PREFIX = len("<PowerPoint") - 1
+
+# A ``&`` that does not start an XML reference and a ``<`` that does not start
+# markup, e.g. "R&D" or "x < y" in model output
+_STRAY_MARKUP = re.compile(r"&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);)|<(?![A-Za-z_/!?])")
+# End of a chunk that may continue as a reference or a tag in the next one
+_PARTIAL_MARKUP = re.compile(r"&#?\w{0,8}$|<$")
+
+
+def _local_name(element) -> str:
+    """Lower-cased tag of an element without its namespace, '' for comments and PIs."""
+    tag = element.tag
+    if not isinstance(tag, str):
+        return ''
+    return tag[tag.rfind('}') + 1:].lower()
+
+
+def _element_text(element) -> str:
+    return "".join(element.itertext()).strip()
+
+
+class TopicStreamParser():
+    """
+    Incremental parser for the XML topic format read by utility.parse_topics.
+
+    The document looks like::
+
+        <PowerPoint>
+            <Title>...</Title>
+            <Subtitle>...</Subtitle>
+            <Slide>
+                <Title>...</Title>
+                <BulletPoint>...</BulletPoint>
+            </Slide>
+        </PowerPoint>
+
+    Tag names are matched case-insensitively and may be namespaced. Text is
+    fed in arbitrary chunks to an lxml pull parser; every ``Slide`` is
+    returned by ``feed`` as soon as its end tag arrives, and its element is
+    released. Text before the root element and after its end is ignored. A
+    bare ``&`` or ``<`` in the text, which the model writes often, is escaped
+    before parsing.
+
+    Attributes:
+        title: Text of the first ``Title`` element, once complete.
+        subtitle: Text of the first ``Subtitle`` element, once complete.
+        slides: ``{"title": str, "points": [str]}`` for every slide with a title, in order.
+        done: Whether the root element is complete.
+    """
+
+    def __init__(self) -> None:
+        self.title: Optional[str] = None
+        self.subtitle: Optional[str] = None
+        self.slides: List[dict] = []
+        self.done = False
+        self._pending = ""
+        self._held = ""
+        self._parser = None
+        self._slide = None
+
+    def feed(self, chunk: str) -> List[dict]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk (str): The next piece of the XML
+
+        Returns:
+            List[dict]: The slides completed by this chunk, in order.
+
+        Raises:
+            lxml.etree.XMLSyntaxError: If the XML cannot be parsed.
+        """
+        if self.done or not chunk:
+            return []
+
+        if self._parser is None:
+            self._pending += chunk
+            match = _TOPICS_ROOT.search(self._pending)
+            if match is None:
+                # Keep what could be the beginning of the root tag
+                self._pending = self._pending[-_TOPICS_ROOT_PREFIX:]
+                return []
+            chunk = self._pending[match.start():]
+            self._pending = ""
+            self._parser = etree.XMLPullParser(events=('start', 'end'), recover=True)
+
+        self._parser.feed(self._escape(chunk))
+        return self._read_events()
+
+    def close(self) -> List[dict]:
+        """
+        Finish parsing.
+
+        Elements still open at the end of the input are incomplete, so
+        nothing more is returned and ``done`` stays False for a truncated
+        document.
+
+        Returns:
+            List[dict]: Always empty; every complete slide was returned by ``feed``.
+        """
+        if self._parser is not None and not self.done:
+            try:
+                self._parser.feed(self._escape("", final=True))
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                pass
+        return []
+
+    def _escape(self, chunk: str, final: bool = False) -> str:
+        """Escape stray ``&`` and ``<``, holding back a chunk end that the next chunk decides."""
+        text = self._held + chunk
+        end = len(text)
+        if not final:
+            partial = _PARTIAL_MARKUP.search(text)
+            if partial is not None:
+                end = partial.start()
+        self._held = text[end:]
+
+        parts = []
+        last = 0
+        # Matched on the whole text, so references are recognized up to the held end
+        for match in _STRAY_MARKUP.finditer(text):
+            if match.start() >= end:
+                break
+            parts.append(text[last:match.start()])
+            parts.append('&amp;' if match.group() == '&' else '&lt;')
+            last = match.end()
+        parts.append(text[last:end])
+        return "".join(parts)
+
+    def _read_events(self) -> List[dict]:
+        completed = []
+        for event, element in self._parser.read_events():
+            if self.done:
+                continue
+            name = _local_name(element)
+
+            if event == 'start':
+                if name == 'slide' and self._slide is None:
+                    self._slide = element
+                continue
+
+            if element is self._slide:
+                slide = self._read_slide(element)
+                if slide is not None:
+                    self.slides.append(slide)
+                    completed.append(slide)
+                self._slide = None
+                # Release the slide, only its text is kept
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    parent.remove(element)
+            elif name == 'title' and self.title is None:
+                self.title = _element_text(element)
+            elif name == 'subtitle' and self.subtitle is None:
+                self.subtitle = _element_text(element)
+            elif element.getparent() is None:
+                self.done = True
+        return completed
+
+    def _read_slide(self, element) -> Optional[dict]:
+        title = None
+        points = []
+        for child in element.iterdescendants():
+            name = _local_name(child)
+            if name == 'bulletpoint':
+                points.append(_element_text(child))
+            elif name == 'title' and title is None:
+                title = _element_text(child)
+
+        if title is None:
+            return None
+        return {"title": title, "points": points}
+
+
+def iter_topics(chunks: Iterable[str], parser: Optional[TopicStreamParser] = None) -> Iterator[dict]:
+    """
+    Yield each slide of the XML topic format from a stream of text chunks as soon as it is complete.
+
+    Args:
+        chunks (Iterable[str]): Streamed XML text
+        parser (Optional[TopicStreamParser]): Parser to use, so callers can read
+            ``parser.title`` and ``parser.subtitle`` while or after iterating
+
+    Yields:
+        dict: ``{"title": str, "points": [str]}`` for one slide at a time.
+    """
+    if parser is None:
+        parser = TopicStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
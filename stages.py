@@ -0,0 +1,222 @@
+import logging
+import threading
+from queue import Queue
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+_DONE = object()
+
+
+class Job():
+    """
+    A unit of work flowing through a StagedPipeline.
+
+    Attributes:
+        key: Identifier of the job, e.g. the conversation URL.
+        data: Free-form state the stages read and write.
+        error: Set by the first stage that fails; later stages skip the job.
+        failed_stage: Name of the stage that failed.
+        timings: Seconds each job waited in a stage queue ("<stage>_wait") and
+            spent in the stage ("<stage>").
+    """
+
+    def __init__(self, key: Any, data: Optional[dict] = None) -> None:
+        self.key = key
+        self.data = data if data is not None else {}
+        self.error: Optional[BaseException] = None
+        self.failed_stage: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._enqueued = 0.0
+
+
+class Stage():
+    """
+    One step of a StagedPipeline, run by ``workers`` threads.
+
+    Args:
+        name (str): Name used in timings and stats
+        func (Callable[[Job], None]): Processes a job in place
+        workers (int): Number of worker threads
+        queue_size (int): Capacity of the queue in front of the stage. Producers
+            block when it is full, which bounds the work in flight.
+        on_worker_exit (Optional[Callable[[], None]]): Called in each worker thread
+            before it exits, e.g. to release thread-bound resources
+    """
+
+    def __init__(self, name: str, func: Callable[[Job], None], workers: int = 1, queue_size: int = 8,
+                 on_worker_exit: Optional[Callable[[], None]] = None) -> None:
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least one worker")
+
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue: Queue = Queue(maxsize=queue_size)
+        self.on_worker_exit = on_worker_exit
+        self.processed = 0
+        self.failed = 0
+        self.in_progress = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._running_workers = 0
+
+    def stats(self, elapsed: float) -> Dict[str, float]:
+        """
+        Return the queue depth, counters and throughput of the stage.
+        """
+        with self._lock:
+            processed = self.processed
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "in_progress": self.in_progress,
+                "processed": processed,
+                "failed": self.failed,
+                "throughput_per_s": processed / elapsed if elapsed > 0 else 0.0,
+                "mean_seconds": self.busy_seconds / processed if processed else 0.0,
+            }
+
+
+class StagedPipeline():
+    """
+    Producer/consumer pipeline with bounded queues between stages.
+
+    Each stage has its own worker threads, so browser-bound, network-bound and
+    CPU-bound stages of different jobs overlap. A job that fails in one stage
+    skips the remaining stages and still comes out of ``results``.
+
+    Example:
+        pipeline = StagedPipeline([Stage("scrape", scrape, 2), Stage("render", render, 4)])
+        pipeline.start()
+        for url in urls:
+            pipeline.submit(Job(url))
+        pipeline.close()
+        for job in pipeline.results():
+            ...
+    """
+
+    def __init__(self, stages: List[Stage]) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+
+        self.stages = stages
+        self.output: Queue = Queue()
+        self._threads: List[threading.Thread] = []
+        self._started = None
+
+    def start(self) -> "StagedPipeline":
+        """
+        Start the worker threads of every stage.
+        """
+        self._started = perf_counter()
+        for index, stage in enumerate(self.stages):
+            stage._running_workers = stage.workers
+            for number in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f"{stage.name}-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, job: Job):
+        """
+        Queue a job for the first stage, blocking while its queue is full.
+        """
+        job._enqueued = perf_counter()
+        self.stages[0].queue.put(job)
+
+    def close(self):
+        """
+        Signal that no more jobs will be submitted.
+        """
+        first = self.stages[0]
+        for _ in range(first.workers):
+            first.queue.put(_DONE)
+
+    def results(self) -> Iterator[Job]:
+        """
+        Yield finished jobs in completion order until every stage has drained.
+        """
+        while True:
+            job = self.output.get()
+            if job is _DONE:
+                break
+            yield job
+
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return the stats of every stage, keyed by stage name.
+        """
+        elapsed = perf_counter() - self._started if self._started else 0.0
+        return {stage.name: stage.stats(elapsed) for stage in self.stages}
+
+    def _forward(self, index: int, item):
+        if index + 1 < len(self.stages):
+            if item is not _DONE:
+                item._enqueued = perf_counter()
+            self.stages[index + 1].queue.put(item)
+        else:
+            self.output.put(item)
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        try:
+            while True:
+                job = stage.queue.get()
+                if job is _DONE:
+                    break
+
+                if job.error is not None:
+                    self._forward(index, job)
+                    continue
+
+                started = perf_counter()
+                job.timings[f"{stage.name}_wait"] = round(started - job._enqueued, 4)
+                with stage._lock:
+                    stage.in_progress += 1
+                try:
+                    stage.func(job)
+                except BaseException as e:
+                    # Even SystemExit or KeyboardInterrupt must not drop the job,
+                    # or the submitter waits forever on a queue nobody drains
+                    logger.error(f"Stage {stage.name} failed for {job.key}.\nException: {e!r}")
+                    job.error = e
+                    job.failed_stage = stage.name
+                finally:
+                    elapsed = perf_counter() - started
+                    job.timings[stage.name] = round(elapsed, 4)
+                    with stage._lock:
+                        stage.in_progress -= 1
+                        stage.processed += 1
+                        stage.failed += job.error is not None and job.failed_stage == stage.name
+                        stage.busy_seconds += elapsed
+                self._forward(index, job)
+        finally:
+            if stage.on_worker_exit is not None:
+                try:
+                    stage.on_worker_exit()
+                except Exception as e:
+                    logger.warning(f"Cleanup of a {stage.name} worker failed.\nException: {e}")
+
+            with stage._lock:
+                stage._running_workers -= 1
+                last_worker = stage._running_workers == 0
+            if last_worker:
+                # The last worker of a stage passes the end of input downstream
+                if index + 1 < len(self.stages):
+                    for _ in range(self.stages[index + 1].workers):
+                        self._forward(index, _DONE)
+                else:
+                    self._forward(index, _DONE)
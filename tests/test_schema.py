@@ -0,0 +1,82 @@
+import json
+
+from schema import close_json, load_presentation, normalize_presentation, repair_json
+
+
+DECK = {"presentation": {"title": "T", "subtitle": "S", "slides": [
+    {"title": "a", "paragraph": "p", "bullet_points": ["x", "y"]},
+    {"title": "b", "paragraph": "q", "bullet_points": []},
+]}}
+
+
+def test_close_json_drops_trailing_commas():
+    text = '{"slides": [{"title": "a", "bullet_points": ["x", "y",],},],}'
+    assert json.loads(close_json(text)) == {"slides": [{"title": "a", "bullet_points": ["x", "y"]}]}
+
+
+def test_close_json_closes_truncated_string():
+    text = '{"slides": [{"title": "a", "bullet_points": ["x", "unfini'
+    assert json.loads(close_json(text)) == {"slides": [{"title": "a", "bullet_points": ["x", "unfini"]}]}
+
+
+def test_close_json_drops_incomplete_key_and_value():
+    assert json.loads(close_json('{"a": 1, "b"')) == {"a": 1}
+    assert json.loads(close_json('{"a": 1, "b": tr')) == {"a": 1}
+    assert json.loads(close_json('{"a": 1, "b": 12')) == {"a": 1, "b": 12}
+
+
+def test_close_json_ignores_text_after_object():
+    assert json.loads(close_json('prose {"a": [1]} more {prose}')) == {"a": [1]}
+
+
+def test_normalize_presentation_key_casing_and_aliases():
+    data = normalize_presentation({"Presentation": {"Title": "T", "Slides": [
+        {"Title": "a", "bulletPoints": ["x"], "Content": "p"},
+        {"title": "b", "Bullet Points": "- x\n- y"},
+    ]}})
+    assert data == {"presentation": {"title": "T", "subtitle": "", "slides": [
+        {"title": "a", "bullet_points": ["x"], "paragraph": "p"},
+        {"title": "b", "bullet_points": ["x", "y"], "paragraph": ""},
+    ]}}
+
+
+def test_normalize_presentation_adds_wrapper_and_defaults():
+    data = normalize_presentation({"title": "T", "slides": [{"title": "a", "bullet_points": None}]})
+    assert data == {"presentation": {"title": "T", "subtitle": "",
+                                     "slides": [{"title": "a", "paragraph": "", "bullet_points": []}]}}
+
+
+def test_load_presentation_valid():
+    assert load_presentation("Here it is:\n```json\n" + json.dumps(DECK) + "\n```") == (DECK, [])
+
+
+def test_load_presentation_trailing_comma_after_last_slide():
+    text = json.dumps(DECK)[:-3] + ",]}}"
+    assert load_presentation(text) == (DECK, [])
+
+
+def test_load_presentation_truncated():
+    text = json.dumps(DECK)
+    text = text[:text.index('"q"') + 2]
+    data, errors = load_presentation(text)
+    assert errors == []
+    assert data["presentation"]["slides"][1] == {"title": "b", "paragraph": "q", "bullet_points": []}
+
+
+def test_load_presentation_key_casing():
+    text = json.dumps({"Presentation": {"Title": "T", "SubTitle": "S", "Slides": [
+        {"Title": "a", "Paragraph": "p", "BulletPoints": ["x", "y"]},
+        {"Title": "b", "Paragraph": "q"},
+    ]}})
+    assert load_presentation(text) == (DECK, [])
+
+
+def test_load_presentation_reports_errors():
+    data, errors = load_presentation('{"presentation": {"title": "T", "slides": []}}')
+    assert errors == ["$.presentation.slides: no slides"]
+    assert load_presentation("no json here") == (None, ["$: no JSON object found in the response"])
+
+
+def test_repair_json_prefers_slide_document_over_prose_object():
+    text = 'Using {"style": "dark"} for ' + json.dumps(DECK)[:-2]
+    assert repair_json(text) == DECK
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from slide_stream import SlideStreamParser, iter_slides
+
+
+DECK = {"presentation": {"title": "T", "subtitle": "S", "slides": [
+    {"title": "a", "paragraph": "p", "bullet_points": ["x"]},
+    {"title": "b", "paragraph": "q", "bullet_points": []},
+]}}
+
+
+def parse(text, size):
+    parser = SlideStreamParser()
+    slides = list(iter_slides((text[i:i + size] for i in range(0, len(text), size)), parser))
+    return parser, slides
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+@pytest.mark.parametrize("prose", [
+    "",
+    "Here is the {deck}: ",
+    'Using {"style": "dark"} for the ',
+    "see [1] {\n",
+    "see [1] { and {deck}\n```json\n",
+])
+def test_prose_braces_before_document(prose, size):
+    text = prose + json.dumps(DECK, indent=2) + "\n```\nAnything {else}?"
+    parser, slides = parse(text, size)
+    assert slides == DECK["presentation"]["slides"]
+    assert parser.presentation == {"title": "T", "subtitle": "S"}
+    assert parser.result() == DECK
+    assert parser.text == text
+
+
+def test_key_casing_and_missing_wrapper():
+    parser, slides = parse(json.dumps({"Presentation": {"Title": "T", "Sub Title": "S", "Slides": [{"title": "a"}]}}), 4)
+    assert parser.presentation == {"title": "T", "subtitle": "S"}
+    assert slides == [{"title": "a"}]
+
+    parser, slides = parse(json.dumps({"title": "T", "subtitle": "S", "slides": [{"title": "a"}]}), 4)
+    assert parser.presentation == {"title": "T", "subtitle": "S"}
+    assert slides == [{"title": "a"}]
+
+
+def test_truncated_stream():
+    text = json.dumps(DECK)
+    parser, slides = parse(text[:text.index('"b"')], 5)
+    assert slides == DECK["presentation"]["slides"][:1]
+    assert parser.result() is None
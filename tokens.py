@@ -0,0 +1,191 @@
+import os
+import json
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional, fall back to a character based estimate
+    tiktoken = None
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MODEL = "openai:gpt-4o"
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 64000))
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, int]] = {}
+
+
+class PromptPlan(NamedTuple):
+    """
+    Token breakdown of one prompt and the template variant chosen for it.
+
+    Attributes:
+        name: Name of the call, e.g. "note" or "slides".
+        variant: Name of the chosen template variant.
+        template: The chosen template text.
+        system_tokens: Tokens in the system prompt.
+        template_tokens: Tokens in the static template.
+        payload_tokens: Tokens in the per-call payload (chat or note).
+        total_tokens: Sum of the three counts above.
+        budget: The prompt token budget.
+    """
+    name: str
+    variant: str
+    template: str
+    system_tokens: int
+    template_tokens: int
+    payload_tokens: int
+    total_tokens: int
+    budget: int
+
+    @property
+    def within_budget(self) -> bool:
+        return self.total_tokens <= self.budget
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    model_name = model.split(":", 1)[-1]
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Count the tokens in a text for the given model.
+
+    Uses tiktoken when it is installed, otherwise estimates about four
+    characters per token.
+
+    Args:
+        text (str): The text to count
+        model (str): The model identifier, e.g. "openai:gpt-4o"
+
+    Returns:
+        int: The number of tokens.
+    """
+    if not text:
+        return 0
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=64)
+def count_template_tokens(template: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Count the tokens in a static prompt template, cached per template.
+    """
+    return count_tokens(template, model)
+
+
+def plan_prompt(name: str, variants: Sequence[Tuple[str, str]], payload: str, system_prompt: str = "",
+                budget: int = PROMPT_TOKEN_BUDGET, model: str = DEFAULT_MODEL) -> PromptPlan:
+    """
+    Pick the first template variant whose prompt fits in the token budget.
+
+    Variants are tried in order, so list the preferred (largest) one first. If
+    none fits, the smallest prompt is used. The chosen plan is recorded in the
+    token metrics under ``name``.
+
+    Args:
+        name (str): Name of the call the prompt is for, used for metrics
+        variants (Sequence[Tuple[str, str]]): (variant name, template) pairs
+        payload (str): The per-call content inserted into the template
+        system_prompt (str): The system prompt sent with the template
+        budget (int): Maximum number of prompt tokens
+        model (str): The model identifier used for counting
+
+    Returns:
+        PromptPlan: The token breakdown of the chosen variant.
+    """
+    system_tokens = count_template_tokens(system_prompt, model)
+    payload_tokens = count_tokens(payload, model)
+
+    plans = []
+    for variant, template in variants:
+        template_tokens = count_template_tokens(template, model)
+        total = system_tokens + template_tokens + payload_tokens
+        plans.append(PromptPlan(name, variant, template, system_tokens, template_tokens,
+                                payload_tokens, total, budget))
+
+    plan = next((plan for plan in plans if plan.within_budget), None)
+    if plan is None:
+        plan = min(plans, key=lambda plan: plan.total_tokens)
+        logger.warning(f"The {name} prompt needs {plan.total_tokens} tokens, over the budget of {budget}")
+    elif plan is not plans[0]:
+        logger.info(f"Using the {plan.variant} {name} template to stay within {budget} tokens")
+
+    record_prompt(plan)
+    return plan
+
+
+def record_prompt(plan: PromptPlan):
+    """
+    Add a prompt's token counts to the metrics for its call name.
+    """
+    with _metrics_lock:
+        metrics = _metrics.setdefault(plan.name, {
+            "calls": 0, "prompt_tokens": 0, "system_tokens": 0,
+            "template_tokens": 0, "payload_tokens": 0, "over_budget": 0,
+        })
+        metrics["calls"] += 1
+        metrics["prompt_tokens"] += plan.total_tokens
+        metrics["system_tokens"] += plan.system_tokens
+        metrics["template_tokens"] += plan.template_tokens
+        metrics["payload_tokens"] += plan.payload_tokens
+        metrics["over_budget"] += not plan.within_budget
+        variant_key = f"variant_{plan.variant}"
+        metrics[variant_key] = metrics.get(variant_key, 0) + 1
+
+
+def token_metrics() -> Dict[str, Dict[str, int]]:
+    """
+    Return a copy of the accumulated token metrics per call name.
+    """
+    with _metrics_lock:
+        return {name: dict(metrics) for name, metrics in _metrics.items()}
+
+
+def reset_token_metrics():
+    """
+    Clear the accumulated token metrics.
+    """
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def export_token_metrics(path: str):
+    """
+    Write the token metrics to a JSON file.
+    """
+    with open(path, 'w') as f:
+        json.dump(token_metrics(), f, indent=2)
+
+
+def token_metrics_prometheus() -> str:
+    """
+    Render the token metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for name, metrics in sorted(token_metrics().items()):
+        for metric, value in sorted(metrics.items()):
+            if metric.startswith("variant_"):
+                variant = metric[len("variant_"):]
+                lines.append(f'convo2slide_prompt_variant_total{{call="{name}",variant="{variant}"}} {value}')
+            else:
+                lines.append(f'convo2slide_{metric}_total{{call="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
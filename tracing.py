@@ -0,0 +1,241 @@
+import os
+import json
+import logging
+import secrets
+import threading
+from time import time_ns
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+SERVICE_NAME = "convo2slide"
+
+_enabled = os.environ.get("TRACING", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_spans: List["Span"] = []
+_counters: Dict[str, float] = {}
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class _NoopSpan():
+    """Returned by ``span`` while tracing is disabled; every method does nothing."""
+
+    recording = False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add(self, key: str, value: float = 1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span():
+    """
+    A timed operation with attributes, nested under the span that was active when it started.
+    """
+
+    recording = True
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        parent = _current_span.get()
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add(self, key: str, value: float = 1):
+        """Increase a numeric attribute, e.g. a byte or token count."""
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start_ns = time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.end_ns = time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        with _lock:
+            _spans.append(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def enable_tracing(enabled: bool = True):
+    """
+    Turn tracing on or off for the whole process.
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **attributes):
+    """
+    Start a span as a context manager.
+
+    While tracing is disabled a shared no-op span is returned, so instrumented
+    code pays only for this call. Guard expensive attribute computations with
+    ``if s.recording``.
+
+    Args:
+        name (str): Name of the operation
+        **attributes: Initial span attributes
+
+    Returns:
+        Span: The span, or a no-op span when tracing is disabled.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def current_span():
+    """
+    Return the innermost active span, or a no-op span when there is none.
+    """
+    return _current_span.get() or _NOOP_SPAN
+
+
+def add_counter(name: str, value: float = 1):
+    """
+    Increase a process-wide counter. Does nothing while tracing is disabled.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def finished_spans() -> List[Span]:
+    """
+    Return the spans finished so far, in completion order.
+    """
+    with _lock:
+        return list(_spans)
+
+
+def counters() -> Dict[str, float]:
+    """
+    Return a copy of the counters.
+    """
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    """
+    Drop all recorded spans and counters.
+    """
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp() -> dict:
+    """
+    Return the recorded spans in the OpenTelemetry OTLP/JSON trace format.
+
+    Counters are attached to the resource as attributes.
+    """
+    spans = []
+    for s in finished_spans():
+        otlp_span = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+
+    resource_attributes = [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]
+    resource_attributes += [{"key": f"counter.{key}", "value": _otlp_value(value)}
+                            for key, value in counters().items()]
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": resource_attributes},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+        }]
+    }
+
+
+def export_trace(path: str, format: str = "json"):
+    """
+    Write the recorded spans and counters to a file.
+
+    Args:
+        path (str): Output file path
+        format (str): "json" for a plain span list with counters, or "otlp" for OTLP/JSON
+    """
+    if format == "otlp":
+        data = to_otlp()
+    elif format == "json":
+        data = {"spans": [s.to_dict() for s in finished_spans()], "counters": counters()}
+    else:
+        raise ValueError(f"Unknown trace format '{format}'. Expected json or otlp.")
+
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    logger.info(f"Wrote {len(finished_spans())} spans to {path}")
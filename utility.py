@@ -1,19 +1,32 @@
 import os
 import re
+import copy
 import json
 import logging
+import threading
 import aisuite as ai
 from dotenv import load_dotenv
-from typing import Tuple, List, Dict, Optional
+from typing import Tuple, List, Dict, Iterator, Optional
 
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE, PP_PARAGRAPH_ALIGNMENT
 from pptx.dml.color import RGBColor
-from pptx.enum.shapes import MSO_SHAPE
+from pptx.shapes.autoshape import Shape
 
-from bs4 import BeautifulSoup
+from lxml import etree
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library parser
+    orjson = None
 from tenacity import retry, stop_after_attempt, wait_exponential
+from cache import CompletionCache, completion_key, create_completion_cache
+from model import THEME_COLORS as DECK_THEME_COLORS, as_presentation, bullet_color
+from slide_stream import TopicStreamParser
+from layout import (CONTENT_TOP, PARAGRAPH_SPACING, SLIDE_TITLE_FONT_SIZE, content_height, layout_content_slide,
+                    layout_title_slide, text_height)
+from tracing import add_counter, span
 
 
 # Configure logging
@@ -26,45 +39,250 @@ load_dotenv()
 
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=15))
-def get_completion(messages: list[dict], model="openai:gpt-4o") -> str:
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Skips text and complete strings up to the next brace outside a string
+_JSON_NEXT_BRACE = re.compile(r'(?:[^{}"]|"[^"\\]*(?:\\.[^"\\]*)*")*([{}])', re.DOTALL)
+
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 20))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", 10))
+
+_client_lock = threading.Lock()
+_clients: Dict[str, ai.Client] = {}
+
+_completion_cache = None
+_completion_cache_configured = False
+
+
+def default_provider_configs() -> dict:
+    """Return the provider configuration built from the environment."""
+    config = {"api_key": os.environ.get("API_KEY")}
+    if os.environ.get("LLM_BASE_URL"):
+        config["base_url"] = os.environ["LLM_BASE_URL"]
+    return {"openai": config}
+
+
+def _pooled_http_client():
+    """Create an HTTP client that keeps connections alive between completions."""
+    import httpx
+
+    return httpx.Client(limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS))
+
+
+def get_client(provider_configs: Optional[dict] = None) -> ai.Client:
+    """ Return the shared aisuite client for the given provider configuration.
+
+    Clients are created once per distinct configuration and reused by every
+    thread, so HTTP connections stay alive between completions and retries.
+
+    Args:
+        provider_configs (dict): aisuite provider configurations. Defaults to default_provider_configs().
+
+    Returns:
+        ai.Client: The configured client.
+    """
+    if provider_configs is None:
+        provider_configs = default_provider_configs()
+
+    key = json.dumps(provider_configs, sort_keys=True, default=str)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _client_lock:
+        client = _clients.get(key)
+        if client is None:
+            logger.info("Creating LLM client")
+            configs = {provider: dict(config) for provider, config in provider_configs.items()}
+            if "openai" in configs:
+                configs["openai"].setdefault("http_client", _pooled_http_client())
+            client = ai.Client(configs)
+            _clients[key] = client
+
+    return client
+
+
+def set_completion_cache(cache: Optional[CompletionCache]):
+    """Replace the completion cache used by get_completion. Pass None to disable caching."""
+    global _completion_cache, _completion_cache_configured
+    _completion_cache = cache
+    _completion_cache_configured = True
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """Return the completion cache, creating the one named by COMPLETION_CACHE on first use."""
+    if not _completion_cache_configured:
+        set_completion_cache(create_completion_cache())
+    return _completion_cache
+
+
+def get_completion(messages: list[dict], model="openai:gpt-4o", temperature: float = 1.0) -> str:
     """ Generate a completion for the given messages and model.
+
+    Identical requests are answered from the completion cache, so reruns after a
+    downstream failure do not pay for the LLM call again.
     
     Args:
         messages (list): A list of messages, where each message is a dictionary with the following keys:
             - role: The role of the sender of the message, e.g. "user" or "system".
             - content: The text of the message.
         model (str): The model to use to generate the completion.
+        temperature (float): The sampling temperature.
     
     Returns:
         str: The generated completion.
     """
+    with span("get_completion", model=model) as s:
+        cache = get_completion_cache()
+        if cache is None:
+            return _create_completion(messages, model, temperature)
+
+        key = completion_key(model, temperature, messages)
+        completion = cache.get(key)
+        s.set_attribute("cache_hit", completion is not None)
+        if completion is not None:
+            logger.info("Using cached completion for messages")
+            add_counter("llm.cache_hits")
+            return completion
+
+        completion = _create_completion(messages, model, temperature)
+        if completion:
+            cache.put(key, completion)
+        return completion
+
+
+def forget_completion(messages: list[dict], model="openai:gpt-4o", temperature: float = 1.0):
+    """ Drop the cached completion of a request, e.g. after its answer was rejected.
+
+    The next identical request then goes to the model again instead of
+    replaying the rejected answer.
+
+    Args:
+        messages (list): The messages passed to get_completion
+        model (str): The model passed to get_completion
+        temperature (float): The sampling temperature passed to get_completion
+    """
+    cache = get_completion_cache()
+    if cache is not None:
+        cache.delete(completion_key(model, temperature, messages))
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=15))
+def _create_completion(messages: list[dict], model: str, temperature: float) -> str:
     logger.info(f"Getting completion for messages:")
-    client = ai.Client()
-    client.configure({"openai" : {
-  "api_key": os.environ.get("API_KEY"),
-}})
+    client = get_client()
     response = None
     model = model
-    try:
-        logger.info("Trying to get completion for messages")
-        response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=1.0,
-            )
-    except Exception as e:
-        logger.error(f"Error getting completion for messages.\nException: {e}")
-        raise  # Allow @retry to handle the exception
-    else:
-        logger.info(f"successfully got completion for messages")
-        return response.choices[0].message.content
-    
+    add_counter("llm.attempts")
+    # One span per attempt, so retries show up separately
+    with span("llm_request", model=model) as s:
+        try:
+            logger.info("Trying to get completion for messages")
+            response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                )
+        except Exception as e:
+            logger.error(f"Error getting completion for messages.\nException: {e}")
+            add_counter("llm.failed_attempts")
+            raise  # Allow @retry to handle the exception
+        else:
+            logger.info(f"successfully got completion for messages")
+            content = response.choices[0].message.content
+            if s.recording:
+                _record_usage(s, messages, content, getattr(response, "usage", None))
+            return content
+
+
+def _record_usage(s, messages: list[dict], completion: Optional[str], usage=None):
+    """Add request/response bytes and token counts of a completion to a span and the counters."""
+    request_bytes = sum(len(str(message.get('content', '')).encode()) for message in messages)
+    response_bytes = len(completion.encode()) if completion else 0
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+
+    s.set_attribute("request_bytes", request_bytes)
+    s.set_attribute("response_bytes", response_bytes)
+    add_counter("llm.request_bytes", request_bytes)
+    add_counter("llm.response_bytes", response_bytes)
+    if prompt_tokens is not None:
+        s.set_attribute("prompt_tokens", prompt_tokens)
+        add_counter("llm.prompt_tokens", prompt_tokens)
+    if completion_tokens is not None:
+        s.set_attribute("completion_tokens", completion_tokens)
+        add_counter("llm.completion_tokens", completion_tokens)
+    
+
+def stream_completion(messages: list[dict], model="openai:gpt-4o", temperature: float = 1.0) -> Iterator[str]:
+    """ Stream a completion for the given messages and model as text deltas.
+
+    Cached completions are yielded as a single chunk. A streamed completion is
+    added to the completion cache once it has been fully received.
+
+    Args:
+        messages (list): A list of messages with 'role' and 'content' keys.
+        model (str): The model to use to generate the completion.
+        temperature (float): The sampling temperature.
+
+    Yields:
+        str: The next piece of the completion text.
+    """
+    cache = get_completion_cache()
+    key = completion_key(model, temperature, messages)
+    if cache is not None:
+        completion = cache.get(key)
+        if completion is not None:
+            logger.info("Using cached completion for messages")
+            add_counter("llm.cache_hits")
+            yield completion
+            return
+
+    parts = []
+    with span("llm_stream", model=model) as s:
+        for chunk in _open_completion_stream(messages, model, temperature):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+
+        logger.info(f"successfully streamed completion for messages")
+        completion = "".join(parts)
+        if s.recording:
+            s.set_attribute("chunks", len(parts))
+            _record_usage(s, messages, completion)
+    if cache is not None and completion:
+        cache.put(key, completion)
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=15))
+def _open_completion_stream(messages: list[dict], model: str, temperature: float):
+    logger.info("Trying to stream completion for messages")
+    add_counter("llm.attempts")
+    with span("llm_request", model=model, stream=True):
+        try:
+            return get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=True,
+                )
+        except Exception as e:
+            logger.error(f"Error streaming completion for messages.\nException: {e}")
+            add_counter("llm.failed_attempts")
+            raise  # Allow @retry to handle the exception
+
 
 def parse_topics(xml_string: str) -> Tuple[str, str, List[Dict[str, List[str]]]]:
     """
     Parse an XML string containing slides into structured data.
 
+    The XML is read with slide_stream.TopicStreamParser, an lxml pull parser
+    that matches tag names case-insensitively.
+
     Args:
         xml_string (str): XML string containing topic suggestions.
 
@@ -78,72 +296,114 @@ def parse_topics(xml_string: str) -> Tuple[str, str, List[Dict[str, List[str]]]]
         ValueError: If XML parsing fails or required elements are missing.
     """
     logger.info("Parsing topics from XML.")
-    print(xml_string)
+    logger.debug(xml_string)
 
+    parser = TopicStreamParser()
     try:
-        # Parse the XML string using BeautifulSoup
-        match = re.search(r"<PowerPoint.*?>.*?</PowerPoint>", xml_string, re.DOTALL | re.IGNORECASE)
-        xml_clean = match.group(0)
-        soup = BeautifulSoup(xml_clean, 'xml')
-        logger.debug("XML successfully parsed with BeautifulSoup.")
-    except Exception as e:
+        parser.feed(xml_string)
+        parser.close()
+    except etree.XMLSyntaxError as e:
         logger.error(f"Failed to parse XML: {e}")
         raise ValueError("Invalid XML input.") from e
 
-    try:
-        # Extract title and subtitle
-        title = soup.find(re.compile('Title', re.IGNORECASE)).get_text(strip=True)
-        subtitle = soup.find(re.compile('Subtitle', re.IGNORECASE)).get_text(strip=True)
-        logger.debug(f"Extracted Title: {title}, Subtitle: {subtitle}")
-    except AttributeError as e:
+    if not parser.done:
+        logger.error("Failed to parse XML: no complete PowerPoint element.")
+        raise ValueError("Invalid XML input.")
+
+    if parser.title is None or parser.subtitle is None:
         logger.error("Missing required elements in the XML: Title or Subtitle.")
-        raise ValueError("XML is missing required elements: Title or Subtitle.") from e
-
-    # Extract slides data
-    slides_data = []
-    for slide in soup.find_all(re.compile('Slide', re.IGNORECASE)):
-        slide_title = slide.find(re.compile('Title', re.IGNORECASE))
-        bullet_points = slide.find_all(re.compile('BulletPoint', re.IGNORECASE))
-
-        if slide_title:
-            slide_dict = {
-                "title": slide_title.get_text(strip=True),
-                "points": [point.get_text(strip=True) for point in bullet_points]
-            }
-            slides_data.append(slide_dict)
-            logger.debug(f"Parsed slide: {slide_dict}")
+        raise ValueError("XML is missing required elements: Title or Subtitle.")
+    logger.debug(f"Extracted Title: {parser.title}, Subtitle: {parser.subtitle}")
 
     logger.info("Successfully parsed topics from XML.")
 
-    return title, subtitle, slides_data
+    return parser.title, parser.subtitle, parser.slides
+
+
+def find_json_object(text: str, start: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Find the first balanced JSON object in a text.
+
+    The text is scanned once from ``start``, jumping from brace to brace, so
+    braces inside JSON strings are ignored and surrounding prose or code
+    fences do not matter.
+
+    Args:
+        text (str): Text containing a JSON object.
+        start (int): Index to start searching from.
+
+    Returns:
+        Optional[Tuple[int, int]]: Start and end index of the object, or None if
+            no balanced object starts at or after ``start``.
+    """
+    next_brace = _JSON_NEXT_BRACE.match
+    begin = text.find('{', start)
+    if begin == -1:
+        return None
+
+    depth = 0
+    pos = begin
+    while True:
+        match = next_brace(text, pos)
+        if match is None:
+            # Unbalanced braces or an unterminated string
+            return None
+        pos = match.end()
+        if match.group(1) == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return begin, pos
+
+
+def _json_candidates(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield the spans that may hold the JSON object of a response, most likely first."""
+    begin = text.find('{')
+    if begin == -1:
+        return
+
+    # Usually the object runs from the first to the last brace; parsing that span
+    # directly is much faster than scanning it. If it parses, it is also the first
+    # balanced object, so the result is the same as the scanner's.
+    yield begin, text.rfind('}') + 1
+
+    # Only top-level objects: an object nested in one that does not parse is
+    # a fragment of the broken JSON, not the answer
+    bounds = find_json_object(text, begin)
+    while bounds is not None:
+        yield bounds
+        bounds = find_json_object(text, bounds[1])
 
 
 def extract_json(text: str) -> Optional[dict]:
     """
-    Extract JSON data from text string.
+    Extract the first JSON object from a model response.
+
+    Top-level balanced ``{...}`` candidates are tried in order until one parses, so prose
+    with braces before or after the JSON and fenced code blocks are tolerated.
+    Uses orjson when it is installed.
 
     Args:
         text (str): Text containing JSON data.
 
     Returns:
-        Optional[tuple]: A tuple containing:
-            - Title of the slides (str)
-            - Subtitle of the slides (str) 
-            - A list of dictionaries with slide data
-        Returns None if no valid JSON is found.
-
+        Optional[dict]: The parsed JSON object, or None if no valid JSON is found.
     """
     logger.info("start extracting JSON from text.")
 
-    # Use regex to extract the JSON part
-    json_match = re.search(r'\{.*\}', text, re.DOTALL)
-
-    if json_match:
-        json_str = json_match.group(0)  # Extract matched JSON string
-        data_dict = json.loads(json_str)  # Convert JSON string to dictionary
-        logger.info("Successfully extracted JSON from text.")
-        return data_dict
-    else:
+    with span("extract_json", bytes=len(text)) as s:
+        for begin, end in _json_candidates(text):
+            try:
+                data_dict = _json_loads(text[begin:end])
+            except ValueError:
+                # Not JSON (e.g. a brace in prose), try the next candidate
+                continue
+            s.set_attribute("json_bytes", end - begin)
+            logger.info("Successfully extracted JSON from text.")
+            return data_dict
+
+        s.set_attribute("found", False)
         logger.error("No JSON found.")
         return None
 
@@ -160,6 +420,10 @@ def apply_theme_color(shape, rgb):
 
 def estimate_text_height(text, font_size, width_inches):
     """Estimate the height needed for text based on font size and width
+
+    The text is wrapped with the advance widths of the measuring font (see
+    layout.line_counts).
+
     Args:
         text (str): The text to estimate height for
         font_size (int): Font size in points
@@ -168,19 +432,7 @@ def estimate_text_height(text, font_size, width_inches):
     Returns:
         float: Estimated height in inches needed for the text
     """
-    chars_per_line = int((width_inches * 96) / (font_size * 0.6))
-    words = text.split()
-    lines = 1
-    current_line_length = 0
-    
-    for word in words:
-        if current_line_length + len(word) + 1 > chars_per_line:
-            lines += 1
-            current_line_length = len(word)
-        else:
-            current_line_length += len(word) + 1
-            
-    return (lines * font_size * 1.2) / 72
+    return text_height(text, font_size, width_inches)
 
 def calculate_content_height(paragraph_text, bullet_points, font_size):
     """Calculate total height needed for content with given font size
@@ -193,18 +445,7 @@ def calculate_content_height(paragraph_text, bullet_points, font_size):
     Returns:
         float: Total height in inches needed for all content
     """
-    total_height = 0
-    
-    if paragraph_text:
-        total_height += estimate_text_height(paragraph_text, font_size, 12)
-        total_height += 0.3
-    
-    if bullet_points:
-        for point in bullet_points:
-            total_height += estimate_text_height(point, font_size, 11)
-            total_height += 0.1
-    
-    return total_height
+    return content_height(paragraph_text, bullet_points, font_size)
 
 def add_bullet_point(tf, text, theme_colors, font_size):
     """Helper function to add properly formatted bullet points
@@ -219,38 +460,44 @@ def add_bullet_point(tf, text, theme_colors, font_size):
     p.text = f"• {text}"
     p.font.size = Pt(font_size)
     
-    if any(char in text for char in ["=", "+", "^", "*", "/"]):
-        p.font.color.rgb = theme_colors['accent']
-    else:
-        p.font.color.rgb = theme_colors['text']
+    p.font.color.rgb = bullet_color(text, theme_colors)
 
     p.space_after = Pt(12)
     p.level = 0
     return p
 
-def create_title_slide(prs, presentation_data, THEME_COLORS):
+def add_blank_slide(prs, slide_layout):
+    """Append a slide based on ``slide_layout`` without its placeholders.
+
+    Slides.add_slide clones the layout placeholders, which PowerPoint shows as
+    "Click to add title" over the text boxes of this project's slides. The
+    slide shows the layout's background shapes either way.
+
+    Args:
+        prs (Presentation): PowerPoint presentation object
+        slide_layout: The layout of the new slide
+
+    Returns:
+        Slide: The new slide, with no shapes.
+    """
+    rId, slide = prs.part.add_slide(slide_layout)
+    prs.slides._sldIdLst.add_sldId(rId)
+    return slide
+
+def create_title_slide(prs, presentation_data, THEME_COLORS, text_layout=None):
     """Create title slide with improved text handling
 
     Args:
         prs: PowerPoint presentation object
-        presentation_data (dict): Dictionary containing presentation metadata
+        presentation_data (dict or model.Presentation): Presentation title and subtitle
         THEME_COLORS (dict): Dictionary of theme colors
+        text_layout (layout.TitleSlideLayout, optional): Precomputed layout, fitted here if not given
     """
-    title_slide = prs.slides.add_slide(prs.slide_layouts[0])
-    
-    # Background
-    background = title_slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, 0, 0, prs.slide_width, prs.slide_height
-    )
-    apply_theme_color(background, THEME_COLORS['primary'])
-    
-    # Accent bar
-    accent_bar = title_slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE,
-        Inches(1), Inches(3),
-        Inches(2), Inches(0.1)
-    )
-    apply_theme_color(accent_bar, THEME_COLORS['accent'])
+    if text_layout is None:
+        text_layout = layout_title_slide(presentation_data)
+
+    # The background and accent bar are in the slide layout (see add_layout_chrome)
+    title_slide = add_blank_slide(prs, prs.slide_layouts[0])
     
     # Title with improved text handling
     title_box = title_slide.shapes.add_textbox(
@@ -262,17 +509,12 @@ def create_title_slide(prs, presentation_data, THEME_COLORS):
     title_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT  # Enable auto-sizing
     
     title_para = title_frame.add_paragraph()
-    title_para.text = presentation_data.get('title', 'Presentation Title')
-    title_para.font.size = Pt(54)
+    title_para.text = text_layout.title
+    # Reduced for long titles
+    title_para.font.size = Pt(text_layout.title_font_size)
     title_para.font.bold = True
     title_para.font.color.rgb = RGBColor(255, 255, 255)
     
-    # Calculate if we need to reduce font size for long titles
-    while (estimate_text_height(title_para.text, 54, 11) > 1.5 and 
-           title_para.font.size > Pt(32)):
-        current_size = title_para.font.size.pt
-        title_para.font.size = Pt(current_size - 2)
-    
     # Subtitle with improved text handling
     subtitle_box = title_slide.shapes.add_textbox(
         Inches(1), Inches(3.5),
@@ -283,42 +525,26 @@ def create_title_slide(prs, presentation_data, THEME_COLORS):
     subtitle_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
     
     subtitle_para = subtitle_frame.add_paragraph()
-    subtitle_para.text = presentation_data.get('subtitle', '')
-    subtitle_para.font.size = Pt(32)
+    subtitle_para.text = text_layout.subtitle
+    # Reduced for long subtitles
+    subtitle_para.font.size = Pt(text_layout.subtitle_font_size)
     subtitle_para.font.color.rgb = THEME_COLORS['secondary']
-    
-    # Calculate if we need to reduce font size for long subtitles
-    while (estimate_text_height(subtitle_para.text, 32, 11) > 2 and 
-           subtitle_para.font.size > Pt(24)):
-        current_size = subtitle_para.font.size.pt
-        subtitle_para.font.size = Pt(current_size - 2)
 
-def create_content_slide(prs, slide_data, idx, THEME_COLORS):
+def create_content_slide(prs, slide_data, idx, THEME_COLORS, text_layout=None):
     """Create a single content slide with dynamic font sizing
     
     Args:
         prs (Presentation): PowerPoint presentation object
-        slide_data (dict): Data for the slide including title, paragraph and bullet points
+        slide_data (model.Slide or dict): Data for the slide including title, paragraph and bullet points
         idx (int): Slide index number
         THEME_COLORS (dict): Theme color definitions
+        text_layout (layout.ContentSlideLayout, optional): Precomputed layout, fitted here if not given
     """
+    if text_layout is None:
+        text_layout = layout_content_slide(slide_data, idx)
    
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    
-    # Background
-    background = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, 0, 0,
-        prs.slide_width, prs.slide_height
-    )
-    background.fill.solid()
-    background.fill.fore_color.rgb = RGBColor(248, 248, 248)
-    
-    # Left bar
-    left_bar = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE,
-        0, 0, Inches(0.25), prs.slide_height
-    )
-    apply_theme_color(left_bar, THEME_COLORS['primary'])
+    # The background, left bar and accent bar are in the slide layout (see add_layout_chrome)
+    slide = add_blank_slide(prs, prs.slide_layouts[1])
     
     # Title (keep original size)
     title_box = slide.shapes.add_textbox(
@@ -327,32 +553,17 @@ def create_content_slide(prs, slide_data, idx, THEME_COLORS):
     )
     title_frame = title_box.text_frame
     title_para = title_frame.add_paragraph()
-    title_para.text = slide_data.get('title', f'Slide {idx}')
-    title_para.font.size = Pt(44)
+    title_para.text = text_layout.title
+    title_para.font.size = Pt(SLIDE_TITLE_FONT_SIZE)
     title_para.font.bold = True
     title_para.font.color.rgb = THEME_COLORS['primary']
     
-    # Accent bar
-    accent_bar = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE,
-        Inches(0.5), Inches(1.4),
-        Inches(2), Inches(0.06)
-    )
-    apply_theme_color(accent_bar, THEME_COLORS['accent'])
-    
-    # Calculate optimal font size for content
-    paragraph_text = slide_data.get('paragraph', '')
-    bullet_points = slide_data.get('bullet_points', [])
+    # Optimal font size for content, from the layout
+    paragraph_text = text_layout.paragraph
+    bullet_points = text_layout.bullet_points
+    font_size = text_layout.font_size
     
-    font_size = 20
-    MIN_FONT_SIZE = 14
-    MAX_CONTENT_HEIGHT = 4.5
-    
-    while (font_size > MIN_FONT_SIZE and 
-           calculate_content_height(paragraph_text, bullet_points, font_size) > MAX_CONTENT_HEIGHT):
-        font_size -= 1
-    
-    current_y = Inches(1.8)
+    current_y = Inches(CONTENT_TOP)
     
     # Add paragraph with calculated font size
     if paragraph_text:
@@ -369,7 +580,7 @@ def create_content_slide(prs, slide_data, idx, THEME_COLORS):
         p.font.color.rgb = THEME_COLORS['text']
         p.space_after = Pt(24)
         
-        current_y += Inches(estimate_text_height(paragraph_text, font_size, 12) + 0.3)
+        current_y += Inches(text_layout.paragraph_height + PARAGRAPH_SPACING)
     
     # Add bullet points with calculated font size
     if bullet_points:
@@ -384,45 +595,154 @@ def create_content_slide(prs, slide_data, idx, THEME_COLORS):
             add_bullet_point(tf, point, THEME_COLORS, font_size)
     
     # Slide number
-    slide_number = slide.shapes.add_textbox(
-        Inches(12), Inches(6.8),
-        Inches(0.5), Inches(0.3)
-    )
-    slide_number_frame = slide_number.text_frame
-    slide_number_para = slide_number_frame.add_paragraph()
-    slide_number_para.text = str(idx)
-    slide_number_para.font.size = Pt(14)
-    slide_number_para.font.color.rgb = THEME_COLORS['primary']
-    slide_number_para.alignment = PP_ALIGN.RIGHT
-
-def create_presentation(json_data):
-    """Create a PowerPoint presentation from JSON data.
-    
+    add_slide_number(slide, idx, THEME_COLORS['primary'])
+
+def _add_layout_rectangle(layout, left, top, width, height, rgb):
+    """Add a filled rectangle to a slide layout, below its placeholders."""
+    tree = layout.shapes._spTree
+    shape_id = layout.shapes._next_shape_id
+    sp = tree.add_autoshape(shape_id, f"Rectangle {shape_id - 1}", "rect", left, top, width, height)
+    # Keep the group properties first and the placeholders on top
+    tree.remove(sp)
+    tree.insert(len(tree.xpath('./p:nvGrpSpPr|./p:grpSpPr|./p:sp[not(.//p:ph)]')), sp)
+    apply_theme_color(Shape(sp, layout.shapes), rgb)
+
+
+def add_layout_chrome(prs, THEME_COLORS):
+    """Draw the static background and bars once in the slide layouts.
+
+    Every slide based on a layout shows its shapes, so the title and content
+    slides only add their text. This keeps the shapes out of every slide part,
+    which makes rendering faster and the file smaller.
+
     Args:
-        json_data (dict): JSON data containing presentation content and structure
-    
+        prs (Presentation): The presentation whose layouts 0 (title) and 1 (content) are used
+        THEME_COLORS (dict): Theme color definitions
+    """
+    title_layout = prs.slide_layouts[0]
+    _add_layout_rectangle(title_layout, 0, 0, prs.slide_width, prs.slide_height, THEME_COLORS['primary'])
+    _add_layout_rectangle(title_layout, Inches(1), Inches(3), Inches(2), Inches(0.1), THEME_COLORS['accent'])
+
+    content_layout = prs.slide_layouts[1]
+    _add_layout_rectangle(content_layout, 0, 0, prs.slide_width, prs.slide_height, THEME_COLORS['background'])
+    _add_layout_rectangle(content_layout, 0, 0, Inches(0.25), prs.slide_height, THEME_COLORS['primary'])
+    _add_layout_rectangle(content_layout, Inches(0.5), Inches(1.4), Inches(2), Inches(0.06), THEME_COLORS['accent'])
+
+
+_slide_number_prototypes = {}
+
+def add_slide_number(slide, idx, color):
+    """Add the slide number box to a content slide.
+
+    The box is built with python-pptx once per color and cloned from its XML
+    for every later slide, with only the id and the number changed.
+
+    Args:
+        slide: The slide to add the number to
+        idx (int): The number to show
+        color (RGBColor): Text color
+    """
+    prototype = _slide_number_prototypes.get(str(color))
+    if prototype is None:
+        slide_number = slide.shapes.add_textbox(
+            Inches(12), Inches(6.8),
+            Inches(0.5), Inches(0.3)
+        )
+        slide_number_frame = slide_number.text_frame
+        slide_number_para = slide_number_frame.add_paragraph()
+        slide_number_para.text = str(idx)
+        slide_number_para.font.size = Pt(14)
+        slide_number_para.font.color.rgb = color
+        slide_number_para.alignment = PP_ALIGN.RIGHT
+        _slide_number_prototypes[str(color)] = copy.deepcopy(slide_number._element)
+        return
+
+    element = copy.deepcopy(prototype)
+    shape_id = slide.shapes._next_shape_id
+    c_nv_pr = element.nvSpPr.cNvPr
+    c_nv_pr.id = shape_id
+    c_nv_pr.name = f"TextBox {shape_id - 1}"
+    element.xpath('.//a:t')[0].text = str(idx)
+    slide.shapes._spTree.append(element)
+
+
+def new_presentation():
+    """Create an empty widescreen presentation and its theme colors.
+
     Returns:
-        Presentation: A PowerPoint presentation object
+        Tuple[Presentation, dict]: The presentation object and the theme colors
     """
     prs = Presentation()
     
-    THEME_COLORS = {
-        'primary': RGBColor(0, 75, 135),
-        'secondary': RGBColor(240, 240, 240),
-        'accent': RGBColor(255, 127, 0),
-        'text': RGBColor(51, 51, 51)
-    }
+    # Shared by all decks (see model.THEME_COLORS)
+    THEME_COLORS = DECK_THEME_COLORS
     
     prs.slide_width = Inches(13.333)
     prs.slide_height = Inches(7.5)
+
+    add_layout_chrome(prs, THEME_COLORS)
+
+    return prs, THEME_COLORS
+
+def create_presentation_from_stream(presentation_data, slides, deck_layout=None):
+    """Create a PowerPoint presentation while the slides are still being generated.
+
+    The title slide is rendered once the first slide arrives, so
+    ``presentation_data`` may be filled in while the stream is consumed
+    (see slide_stream.SlideStreamParser.presentation).
+
+    Args:
+        presentation_data (dict): Presentation title and subtitle
+        slides (Iterable[dict]): Slide data, rendered one by one as it is produced
+        deck_layout (layout.DeckLayout, optional): Precomputed layout of the whole deck
+
+    Returns:
+        Presentation: A PowerPoint presentation object
+    """
+    with span("create_presentation") as s:
+        prs, THEME_COLORS = new_presentation()
+
+        slides = iter(slides)
+        first_slide = next(slides, None)
+        
+        # Create title slide with improved handling
+        create_title_slide(prs, presentation_data, THEME_COLORS,
+                           deck_layout.title if deck_layout is not None else None)
+        
+        # Create content slides
+        if first_slide is not None:
+            slide_layouts = deck_layout.slides if deck_layout is not None else ()
+            create_content_slide(prs, first_slide, 1, THEME_COLORS, slide_layouts[0] if slide_layouts else None)
+            for idx, slide_data in enumerate(slides, 2):
+                create_content_slide(prs, slide_data, idx, THEME_COLORS,
+                                     slide_layouts[idx - 1] if slide_layouts else None)
+
+        s.set_attribute("slides", len(prs.slides))
     
-    presentation_data = json_data.get('presentation', {})
+    return prs
+
+def create_presentation(json_data, workers=None, deck_layout=None):
+    """Create a PowerPoint presentation from JSON data.
     
-    # Create title slide with improved handling
-    create_title_slide(prs, presentation_data, THEME_COLORS)
+    Large decks are rendered in a process pool (see render_pool.py) when more
+    than one worker is allowed; the slides are the same either way.
     
-    # Create content slides
-    for idx, slide_data in enumerate(presentation_data.get('slides', []), 1):
-        create_content_slide(prs, slide_data, idx, THEME_COLORS)
+    Args:
+        json_data (dict or model.Presentation): JSON data containing presentation content and structure,
+            or the presentation model, which is rendered as is
+        workers (int, optional): Rendering processes, RENDER_WORKERS by default. 1 renders in this process.
+        deck_layout (layout.DeckLayout, optional): Precomputed layout, used in both modes
+    
+    Returns:
+        Presentation: A PowerPoint presentation object
+    """
+    deck = as_presentation(json_data)
+
+    if workers != 1:
+        import render_pool
+
+        workers = workers or render_pool.RENDER_WORKERS
+        if workers > 1 and len(deck.slides) >= render_pool.PARALLEL_RENDER_MIN_SLIDES:
+            return render_pool.create_presentation_parallel(deck, workers, deck_layout)
     
-    return prs
\ No newline at end of file
+    return create_presentation_from_stream(deck, deck.slides, deck_layout)